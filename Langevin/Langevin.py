@@ -1,253 +1,2884 @@
 # -*- coding: utf-8 -*-
 
 import numpy as np
-import matplotlib.pyplot as plt
 import os
 import argparse
+import multiprocessing
+import itertools
+import inspect
+import hashlib
+import shutil
+import contextlib
+import time
+import json
+import warnings
 
-def RGK(fun, t, y0, vals, wall_size, rand = None):
+#changed whenever a change to the integrators changes their results, so results cached by older versions are not used (see ResultCache)
+INTEGRATOR_VERSION = 1
+
+class Profiler(object):
+    '''
+    Times the phases of a run (integration, noise generation, saving, plotting) and counts what was done (steps, trials, wall hits, bytes written). Off by default, in which case timing and counting do nothing. The time of a phase does not include the phases run inside it, so the times add up to the time spent in all phases. Only the current process is profiled, so with workers > 1 the trials run in the worker processes are counted, but their integration is not.
+
+    The module profiler is PROFILE, which is turned on by setting PROFILE.enabled to True (see --profile).
+    '''
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        '''
+        Clears the times and counts.
+        '''
+        self.seconds = {} #the time spent in each phase
+        self.counts = {}
+        self.stack = [] #the time spent in phases inside each open phase
+
+    def phase(self, name):
+        '''
+        Returns a context manager which adds the time spent in it to the phase name.
+        '''
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timing(name)
+
+    @contextlib.contextmanager
+    def _timing(self, name):
+        inner = [0.0] #the time spent in phases inside this one
+        self.stack.append(inner)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stack.pop()
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed - inner[0]
+            if self.stack:
+                self.stack[-1][0] += elapsed
+
+    def timed(self, iterable, name):
+        '''
+        Returns iterable, with the time spent producing each item (e.g. by a generator which integrates) added to the phase name.
+        '''
+        if not self.enabled:
+            return iterable
+        return self._timed(iter(iterable), name)
+
+    def _timed(self, it, name):
+        while True:
+            with self._timing(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name, n = 1):
+        '''
+        Adds n to the counter name.
+        '''
+        if self.enabled:
+            self.counts[name] = self.counts.get(name, 0) + int(n)
+
+    def report(self, total = None):
+        '''
+        Returns the times and counts as a dict. If the total time of the run is given, the time not spent in any phase is reported as 'other'.
+        '''
+        seconds = dict(self.seconds)
+        if total is not None:
+            seconds['other'] = max(total - sum(self.seconds.values()), 0.0)
+            seconds['total'] = total
+        return {'seconds': seconds, 'counts': dict(self.counts)}
+
+    def print_report(self, total = None):
+        '''
+        Prints the times and counts as a table.
+        '''
+        report = self.report(total)
+        print('{:<16} {:>12}' .format('phase', 'seconds'))
+        for name, seconds in report['seconds'].items():
+            print('{:<16} {:>12.4f}' .format(name, seconds))
+        print('{:<16} {:>12}' .format('counter', 'count'))
+        for name, n in report['counts'].items():
+            print('{:<16} {:>12d}' .format(name, n))
+
+#the profiler of the module, see Profiler
+PROFILE = Profiler()
+
+def RGK(fun, t, y0, vals, wall_size, rand = None, rng = None):
+    '''
+    Takes a function, time range, and initial conditions, and numerically integratesthe function according to the Runge-Kutta Method.
+
+    Arguments:
+    fun (function):
+    The ODE('s) to be integrated. Should take the independent variable (t) and the dependent variable (y) as arguments, in that order. Should return the derivative of y with respect to t.
+    For multiple ordinary differential equations, the dependent variable input should be a list of each variable. The output should return each derivative in the same order that the variables were input, as a list.
+    It is important that the initial conditions (y0) are in the same order as the output of fun.
+
+    t (array):
+    The array of values to be integrated over. t[0] is the initial condition.
+
+    y0 (list or array):
+    The initial values of each variable to be integrated. Must be in the same order as the output of fun.
+
+    vals (list or array):
+    The problem parameters which fun must take in addition to t and y. Should be in the same order that they are required in the function.
+
+    wall_size (float):
+    The location of the second wall. The first wall is placed at x = 0. If the particle hits the wall, the simulation will stop.
+
+    rand (list or array):
+    A random value to be added to a variable. The first input is the variable to be added to (indexed 0, 1,...). The second input is the mean of the distribution, the third input is the standard deviation of the distribution. The value is pulled from a normal distribution. The value will be multiplied by the change in t at that time step and divided by the mass, m (vals[0]). This option can be opted out of by setting rand = None, which is the default.
+
+    rng (numpy Generator or RandomState):
+    The random number generator the random value is pulled from. If None, the global numpy.random state is used, which is the default.
+
+    Returns:
+    F (matrix): 
+    The solution to the ODE's stacked vertically. The order of stacking is the same as the order of the output of fun.
+    '''
+    step, n_noise = RK4_step(fun, vals, rand)
+
+    return Integrate(step, n_noise, t, y0, wall_size, rng)
+
+def RGK_ensemble(fun, t, y0, vals, wall_size, trials, rand = None, rng = None):
+    '''
+    Integrates many independent copies of the same system at once according to the Runge-Kutta Method. All trials are stored in a single (len(y0), trials) array and are advanced through the RGK stages together, so the cost of a step is paid once for the whole ensemble rather than once per trial.
+
+    Arguments:
+    fun (function):
+    See RGK. Must accept arrays for each dependent variable (one value per trial) and return arrays of the derivatives in the same format. ODE satisfies this.
+
+    trials (int):
+    The number of trajectories to integrate.
+
+    See RGK for other arguments. The random value (see rand) is drawn separately for every trial.
+
+    Returns:
+    t_exit (array):
+    The time at which each trial first reached a wall (see wall_size), or t[-1] for trials which never did. Once a trial reaches a wall it is absorbed, and is not integrated any further.
+
+    F (matrix):
+    The final values of the dependent variables for each trial, stacked vertically in the same order as the output of fun. Column i belongs to trial i.
+
+    hit (array):
+    True for each trial which reached a wall.
+    '''
+    step, n_noise = RK4_step(fun, vals, rand)
+
+    return Integrate_ensemble(step, n_noise, t, y0, wall_size, trials, rng)
+
+def RGK_chunks(fun, t, y0, vals, wall_size, rand = None, rng = None, chunk_size = 65536):
+    '''
+    Integrates fun according to the Runge-Kutta Method like RGK, but generates the solution in chunks as the integration proceeds instead of returning it at the end, so the memory needed is set by chunk_size rather than by the number of time steps.
+
+    Arguments:
+    chunk_size (int):
+    The number of points in each chunk. Default 65536.
+
+    See RGK for other arguments.
+
+    Generates:
+    t, F:
+    See Integrate_chunks.
+    '''
+    step, n_noise = RK4_step(fun, vals, rand)
+
+    return Integrate_chunks(step, n_noise, t, y0, wall_size, rng, chunk_size = chunk_size)
+
+def RGK_first_passage(fun, t, y0, vals, wall_size, rand = None, rng = None):
+    '''
+    Integrates fun according to the Runge-Kutta Method like RGK, but only keeps the current values of the dependent variables instead of the whole solution, so the memory needed does not grow with the number of time steps. Use this when only the time at which a wall is hit matters.
+
+    Arguments:
+    See RGK.
+
+    Returns:
+    t_exit, side, y:
+    See Integrate_first_passage.
+    '''
+    step, n_noise = RK4_step(fun, vals, rand)
+
+    return Integrate_first_passage(step, n_noise, t, y0, wall_size, rng)
+
+def RK4_step(fun, vals, rand = None):
+    '''
+    Builds a single Runge-Kutta step for fun, followed by the random value described by rand. Used by the integrators (see Integrate and Integrate_ensemble).
+
+    Arguments:
+    See RGK.
+
+    Returns:
+    step (function):
+    Takes the current time, the current values of the dependent variables, the time step, and the standard normal values for this step (None if there are none), and returns the next values of the dependent variables.
+
+    n_noise (int):
+    The number of standard normal values step needs at each time step. 1 if rand is given, otherwise 0.
+
+    If fun takes an out argument (see ODE), the derivatives are written into reused scratch buffers instead of new arrays (see RK4_step_inplace), which gives the same values much faster.
+    '''
+    if Accepts_out(fun):
+        return RK4_step_inplace(fun, vals, rand)
+
+    def step(tn, yn, h, z):
+        #RGK parameters
+        k1 = h*np.array(fun(tn, yn, vals))
+        k2 = h*np.array(fun(tn + h/2, yn + k1/2, vals))
+        k3 = h*np.array(fun(tn + h/2, yn + k2/2, vals))
+        k4 = h*np.array(fun(tn + h, yn + k3, vals))
+
+        yn = yn + 1/6*(k1 + 2*k2 + 2*k3 + k4)
+        if z is not None:
+            yn[rand[0]] += (rand[1] + rand[2]*z[0])*h/vals[0] #adds a random aspect to the values
+        return yn
+
+    return step, (0 if rand is None else 1)
+
+def Accepts_out(fun):
+    '''
+    Checks whether fun can write its derivatives into an output array, i.e. whether it takes an argument named out.
+    '''
+    try:
+        return 'out' in inspect.signature(fun).parameters
+    except (TypeError, ValueError): #some builtins have no signature
+        return False
+
+def RK4_step_inplace(fun, vals, rand = None):
+    '''
+    Builds a single Runge-Kutta step like RK4_step, for a fun which writes its derivatives into an output array (fun(t, y, vals, out = out), see ODE). The stages reuse their storage instead of creating new arrays: a single trajectory is stepped with Python floats in reused lists (its values are only converted from and back to an array once per step, with yn.tolist() and np.array), and an ensemble is stepped in reused scratch arrays, so no arrays are created while stepping. The operations are done in the same order as RK4_step, so the results are identical.
+
+    Arguments:
+    See RGK.
+
+    Returns:
+    step, n_noise:
+    See RK4_step. For an ensemble, the array returned by step is reused by the next step, so it must be copied before stepping again.
+    '''
+    scratch = {} #buffers for the current shape of the dependent variables
+
+    def step(tn, yn, h, z):
+        if np.ndim(yn) == 1: #single trajectory
+            n = len(yn)
+            if n not in scratch:
+                scratch.clear()
+                scratch[n] = [[0.0]*n for i in range(5)]
+            k1, k2, k3, k4, tmp = scratch[n]
+            y = yn.tolist()
+
+            #RGK parameters
+            fun(tn, y, vals, out = k1)
+            for j in range(n):
+                k1[j] = h*k1[j]
+                tmp[j] = y[j] + k1[j]/2
+            fun(tn + h/2, tmp, vals, out = k2)
+            for j in range(n):
+                k2[j] = h*k2[j]
+                tmp[j] = y[j] + k2[j]/2
+            fun(tn + h/2, tmp, vals, out = k3)
+            for j in range(n):
+                k3[j] = h*k3[j]
+                tmp[j] = y[j] + k3[j]
+            fun(tn + h, tmp, vals, out = k4)
+            for j in range(n):
+                k4[j] = h*k4[j]
+                y[j] = y[j] + 1/6*(k1[j] + 2*k2[j] + 2*k3[j] + k4[j])
+
+            if z is not None:
+                y[rand[0]] += (rand[1] + rand[2]*z[0])*h/vals[0] #adds a random aspect to the values
+            return np.array(y)
+
+        if yn.shape not in scratch: #ensemble, the number of trials changes when trials are absorbed
+            scratch.clear()
+            scratch[yn.shape] = [np.empty(yn.shape) for i in range(6)]
+        k1, k2, k3, k4, tmp, res = scratch[yn.shape]
+
+        #RGK parameters
+        fun(tn, yn, vals, out = k1)
+        np.multiply(k1, h, out = k1)
+        np.divide(k1, 2, out = tmp)
+        np.add(tmp, yn, out = tmp)
+        fun(tn + h/2, tmp, vals, out = k2)
+        np.multiply(k2, h, out = k2)
+        np.divide(k2, 2, out = tmp)
+        np.add(tmp, yn, out = tmp)
+        fun(tn + h/2, tmp, vals, out = k3)
+        np.multiply(k3, h, out = k3)
+        np.add(yn, k3, out = tmp)
+        fun(tn + h, tmp, vals, out = k4)
+        np.multiply(k4, h, out = k4)
+
+        #1/6*(k1 + 2*k2 + 2*k3 + k4), accumulated in k2
+        np.multiply(k2, 2, out = k2)
+        np.add(k2, k1, out = k2)
+        np.multiply(k3, 2, out = k3)
+        np.add(k2, k3, out = k2)
+        np.add(k2, k4, out = k2)
+        np.multiply(k2, 1/6, out = k2)
+        np.add(yn, k2, out = res)
+
+        if z is not None:
+            res[rand[0]] += (rand[1] + rand[2]*z[0])*h/vals[0] #adds a random aspect to the values
+        return res
+
+    return step, (0 if rand is None else 1)
+
+def OU_coeffs(h, m, gamma, D):
+    '''
+    Calculates the exact transition of the Langevin equation m dv/dt = -gamma*v + F(t) over a time step, where F is a random force with <F(t)F(t')> = 2*D*delta(t - t'). Over a step of length h, the new position and velocity are
+        v(t + h) = a*v(t) + sv*z0
+        x(t + h) = x(t) + b*v(t) + cx*z0 + rx*z1
+    where z0 and z1 are independent standard normal values. This is exact for any h.
+
+    Arguments:
+    h (float):
+    The time step.
+
+    m (float):
+    The mass of the particle.
+
+    gamma (float):
+    The damping coefficient. May be 0.
+
+    D (float):
+    The strength of the random force. In reduced units, D = T*Lambda (see params).
+
+    Returns:
+    a, b, sv, cx, rx (floats):
+    The coefficients of the transition. sv, cx, and rx are the Cholesky factor of the covariance of the velocity and position increments.
+    '''
+    k = gamma/m #relaxation rate of the velocity
+    u = k*h
+    s2 = 2*D/m**2 #diffusion coefficient of the velocity
+
+    a = np.exp(-u)
+    if k == 0:
+        b = h
+        Vv = s2*h
+    else:
+        b = -np.expm1(-u)/k
+        Vv = -s2*np.expm1(-2*u)/(2*k)
+    Cxv = s2*b**2/2 #covariance of the position and velocity increments
+    if u < 1e-3: #series expansion, the closed form loses precision for small u
+        Vx = s2*h**3*(1/3 - u/4 + 7*u**2/60 - u**3/24)
+    else:
+        Vx = s2/k**2*(h - 2*b - np.expm1(-2*u)/(2*k))
+
+    sv = np.sqrt(Vv)
+    cx = Cxv/sv if sv > 0 else 0.0
+    rx = np.sqrt(max(Vx - cx**2, 0.0))
+
+    return a, b, sv, cx, rx
+
+def OU_step(vals, D = 0):
+    '''
+    Builds a single exact Ornstein-Uhlenbeck step for the Langevin equation (see OU_coeffs). Unlike RK4_step, the random force is part of the transition itself, so the step is exact for any time step.
+
+    Arguments:
+    vals (list or array):
+    See ODE.
+
+    D (float):
+    See OU_coeffs. If 0, the step is the exact solution of ODE.
+
+    Returns:
+    step, n_noise:
+    See RK4_step. n_noise is 2 if D > 0, otherwise 0.
+    '''
+    m = vals[0]
+    gamma = vals[1]
+    coeffs = [None, None] #the last time step and its coefficients, reused while the time step is constant
+
+    def step(tn, yn, h, z):
+        if coeffs[0] is None or abs(h - coeffs[0]) > 1e-12*h:
+            coeffs[:] = [h, OU_coeffs(h, m, gamma, D)]
+        a, b, sv, cx, rx = coeffs[1]
+
+        yn1 = np.empty(np.shape(yn))
+        yn1[0] = yn[0] + b*yn[1]
+        yn1[1] = a*yn[1]
+        if z is not None:
+            yn1[0] += cx*z[0] + rx*z[1]
+            yn1[1] += sv*z[0]
+        return yn1
+
+    return step, (2 if D > 0 else 0)
+
+def EM_step(fun, vals, D = 0):
+    '''
+    Builds a single Euler-Maruyama step for fun with a random force of strength D on the velocity (see OU_coeffs):
+        y(t + h) = y(t) + h*fun(t, y(t)) + [0, sqrt(2*D*h)/m*z]
+    where z is a standard normal value. It takes one evaluation of fun per step, and has weak order 1, so its statistics have errors proportional to h.
+
+    Arguments:
+    fun, vals:
+    See RGK.
+
+    D (float):
+    See OU_coeffs. If 0, the step is Euler's method.
+
+    Returns:
+    step, n_noise:
+    See RK4_step. n_noise is 1 if D > 0, otherwise 0.
+    '''
+    m = vals[0]
+
+    def step(tn, yn, h, z):
+        yn1 = yn + h*np.asarray(fun(tn, yn, vals))
+        if z is not None:
+            yn1[1] += np.sqrt(2*D*h)/m*z[0] #the random change of the velocity over the step
+        return yn1
+
+    return step, (1 if D > 0 else 0)
+
+def Heun_step(fun, vals, D = 0):
+    '''
+    Builds a single stochastic Heun step for fun with a random force of strength D on the velocity (see EM_step). This is a two stage stochastic Runge-Kutta method: an Euler-Maruyama step predicts the next values, and the step is then taken with the mean of fun at the start and at the prediction, with the same random value:
+        y* = y(t) + h*fun(t, y(t)) + [0, s*z]
+        y(t + h) = y(t) + h/2*(fun(t, y(t)) + fun(t + h, y*)) + [0, s*z]
+    where s = sqrt(2*D*h)/m. It takes two evaluations of fun per step. For a random force which does not depend on the values, as here, it has weak order 2, so its statistics have errors proportional to h**2.
+
+    Arguments:
+    See EM_step.
+
+    Returns:
+    step, n_noise:
+    See EM_step.
+    '''
+    m = vals[0]
+
+    def step(tn, yn, h, z):
+        f0 = np.asarray(fun(tn, yn, vals))
+        kick = 0 if z is None else np.sqrt(2*D*h)/m*z[0] #the random change of the velocity over the step
+        pred = yn + h*f0
+        pred[1] += kick
+        yn1 = yn + h/2*(f0 + np.asarray(fun(tn + h, pred, vals)))
+        yn1[1] += kick
+        return yn1
+
+    return step, (1 if D > 0 else 0)
+
+def BAOAB_step(vals, D = 0):
+    '''
+    Builds a single BAOAB splitting step for the Langevin equation. The step is split into half a step of the force (B), half a step of the position (A), the exact friction and random force over the whole step (O, see OU_coeffs), then A and B again:
+        x* = x(t) + h/2*v(t)
+        v(t + h) = a*v(t) + sv*z
+        x(t + h) = x* + h/2*v(t + h)
+    There is no potential here, so the B steps do nothing. It takes no evaluations of fun and one random value per step, and samples the equilibrium velocities exactly for any h.
+
+    Arguments:
+    See OU_step.
+
+    Returns:
+    step, n_noise:
+    See RK4_step. n_noise is 1 if D > 0, otherwise 0.
+    '''
+    m = vals[0]
+    gamma = vals[1]
+    coeffs = [None, None] #the last time step and its coefficients, reused while the time step is constant
+
+    def step(tn, yn, h, z):
+        if coeffs[0] is None or abs(h - coeffs[0]) > 1e-12*h:
+            a, b, sv, cx, rx = OU_coeffs(h, m, gamma, D)
+            coeffs[:] = [h, (a, sv)]
+        a, sv = coeffs[1]
+
+        yn1 = np.empty(np.shape(yn))
+        yn1[0] = yn[0] + h/2*yn[1] #A
+        yn1[1] = a*yn[1] #O
+        if z is not None:
+            yn1[1] += sv*z[0]
+        yn1[0] += h/2*yn1[1] #A
+        return yn1
+
+    return step, (1 if D > 0 else 0)
+
+STEPPERS = {} #the integration methods which can be chosen by name, see Register_stepper
+
+def Register_stepper(name, build):
+    '''
+    Adds an integration method which can then be chosen by name in Stepper, and so in Langevin, Hist, and the command line (--method).
+
+    Arguments:
+    name (string):
+    The name of the method.
+
+    build (function):
+    Takes vals, rand, and D (see Stepper) and returns step and n_noise (see RK4_step). step must accept arrays with one column per trial (see Integrate_ensemble).
+    '''
+    STEPPERS[name] = build
+
+def Stepper(method, vals, rand = None, D = 0):
+    '''
+    Builds the step for the Langevin equation with the chosen integration method.
+
+    Arguments:
+    method (string):
+    The name of the method (see Register_stepper):
+    'rk4' for the Runge-Kutta Method with the random value of rand added after every step (see RGK).
+    'ou' for the exact Ornstein-Uhlenbeck transition with random force strength D (see OU_coeffs).
+    'em' for the Euler-Maruyama method (see EM_step).
+    'heun' for the stochastic Heun method (see Heun_step).
+    'baoab' for the BAOAB splitting method (see BAOAB_step).
+    'ou', 'em', 'heun', and 'baoab' (and the adaptive steps of Integrate_adaptive) all solve the same stochastic equation with random force strength D, and converge to the same results as dt shrinks; the positions and velocities of 'ou' are exact at any dt, but exit times found on the time grid still depend on dt (see crossing). 'rk4' does not: its random force is rand, whose size is tied to dt (see params), so it is a different noise model which becomes weaker as dt shrinks, and its results at different dt are not comparable, with each other or with the other methods. benchmarks/bench_methods.py compares their accuracy and cost.
+
+    See RK4_step and OU_step for other arguments.
+
+    Returns:
+    step, n_noise:
+    See RK4_step.
+    '''
+    if method not in STEPPERS:
+        raise ValueError('method must be one of {}, not {!r}' .format(', '.join(repr(name) for name in STEPPERS), method))
+    return STEPPERS[method](vals, rand, D)
+
+Register_stepper('rk4', lambda vals, rand, D: RK4_step(ODE, vals, rand))
+Register_stepper('ou', lambda vals, rand, D: OU_step(vals, D))
+Register_stepper('em', lambda vals, rand, D: EM_step(ODE, vals, D))
+Register_stepper('heun', lambda vals, rand, D: Heun_step(ODE, vals, D))
+Register_stepper('baoab', lambda vals, rand, D: BAOAB_step(vals, D))
+
+def Control_grad(vals, D, wall_size):
+    '''
+    Builds the gradient of an approximate mean time to reach a wall, u(x, v), used as a control variate (see Control_step). For free diffusion with diffusion coefficient Dx = D/gamma**2 (the overdamped limit of the Langevin equation), the mean time to reach a wall from x is exactly
+        u(x) = x*(wall_size - x)/(2*Dx)
+    A particle with velocity v coasts a further m*v/gamma before it stops, so u(x + m*v/gamma) is used.
+
+    Arguments:
+    vals (list or array):
+    See ODE. gamma must be more than 0.
+
+    D (float):
+    See OU_coeffs. Must be more than 0.
+
+    wall_size (float):
+    See RGK.
+
+    Returns:
+    grad (function):
+    Takes the values of the dependent variables (position, velocity), which may have one column per trial, and returns the derivatives of u with respect to them.
+    '''
+    m = vals[0]
+    gamma = vals[1]
+    if gamma <= 0 or D <= 0:
+        raise ValueError('the control variate needs gamma > 0 and a random force')
+    Dx = D/gamma**2
+
+    def grad(y):
+        du = (wall_size - 2*(y[0] + m/gamma*y[1]))/(2*Dx) #du/dx at the coasting position
+        return np.array([du, m/gamma*du])
+
+    return grad
+
+def Control_step(step, grad):
+    '''
+    Wraps step so that the values get one more last row, C, which adds up the random change of every step weighted by the gradient of an approximate mean exit time (see Control_grad):
+        C(t + h) = C(t) + grad(y(t)).(y(t + h) - y0(t + h))
+    where y0(t + h) is the step taken without the random values. The random change has mean 0 whatever the values before the step, so C has mean exactly 0 at the time a wall is reached, for any method and time step. If u were the exact mean exit time, t_exit + C would be the same for every trial, so C is strongly correlated with t_exit and is used as a control variate (see MeanEstimator). Each step is taken twice.
+
+    Arguments:
+    step (function):
+    See RK4_step.
+
+    grad (function):
+    See Control_grad.
+
+    Returns:
+    step (function):
+    See RK4_step, with the extra row C in the values.
+    '''
+    def control(tn, yn, h, z):
+        y = yn[:-1]
+        yn1 = np.empty(np.shape(yn))
+        yn1[:-1] = step(tn, y, h, z) #copied, as some steps reuse the array they return
+        yn1[-1] = yn[-1]
+        if z is not None:
+            yn1[-1] += np.sum(grad(y)*(yn1[:-1] - step(tn, y, h, None)), axis = 0)
+        return yn1
+
+    return control
+
+def Noise(rng, n_noise, n_steps, block_size = 65536, trials = None):
+    '''
+    Generates the standard normal values used by the integrators, one time step at a time. The values are drawn from rng in blocks of many time steps and handed out by index, which is much faster than drawing them one step at a time. The values are the same as those drawn one step at a time from the same rng. When the generator is closed before the end of a block (e.g. when a trajectory reaches a wall, and the integrator returns), a single rng is rewound to where it would be if only the values handed out had been drawn, so the next trajectory which draws from it (e.g. the next Hist trial with the global random state) gets the same values whatever block_size is. A list of generators is not rewound, as each trial's generator is its own.
+
+    Arguments:
+    rng (numpy Generator or RandomState, or list of them):
+    The random number generator. If None, the global numpy.random state is used. If a list, one generator per trial, and each trial draws only from its own generator (see trial_rng).
+
+    n_noise (int):
+    The number of standard normal values needed per trial at each time step. If 0, None is generated at every step.
+
+    n_steps (int):
+    The number of time steps.
+
+    block_size (int):
+    The number of values drawn at once, which bounds the memory used. At least one time step is always drawn at once, and at least 64 with a list of generators, so the cost of calling each generator is shared by many steps. Default 65536.
+
+    trials (int):
+    The number of trials drawn for at each step, for a single rng. None for a single trajectory.
+
+    Generates:
+    z (array):
+    The standard normal values for one time step, with shape (n_noise,) for a single trajectory, or (n_noise, trials).
+    '''
+    if not n_noise:
+        yield from itertools.repeat(None, n_steps)
+        return
+    if rng is None:
+        rng = np.random #uses the global random state
+    shared = not isinstance(rng, (list, tuple)) #a single rng, which is rewound when values are left over
+    shape = (n_noise,) if trials is None else (n_noise, trials) #of the values of one step
+
+    if shared:
+        steps = max(1, block_size//(n_noise*(trials or 1))) #time steps per block
+    else:
+        trials = len(rng)
+        steps = max(64, block_size//(n_noise*trials))
+    for start in range(0, n_steps, steps):
+        b = min(steps, n_steps - start) #never draws past the last step
+        with PROFILE.phase('noise'):
+            if shared:
+                state = rng.bit_generator.state if isinstance(rng, np.random.Generator) else rng.get_state()
+                block = rng.standard_normal((b,) + shape)
+            else:
+                block = np.empty((b, n_noise, trials))
+                for k, r in enumerate(rng):
+                    block[:, :, k] = r.standard_normal((b, n_noise))
+        PROFILE.count('noise_values', block.size)
+        used = 0 #the number of steps handed out from the block
+        try:
+            for z in block:
+                used += 1
+                yield z
+        finally:
+            if shared and used < b: #the rest of the block is not used, so it is given back to rng
+                if isinstance(rng, np.random.Generator):
+                    rng.bit_generator.state = state
+                else:
+                    rng.set_state(state)
+                rng.standard_normal((used,) + shape)
+
+def Integrate(step, n_noise, t, y0, wall_size, rng = None, block_size = 65536):
+    '''
+    Integrates a single trajectory over the times t, one step at a time, until it reaches a wall.
+
+    Arguments:
+    step, n_noise:
+    See RK4_step.
+
+    block_size (int):
+    See Noise.
+
+    See RGK for other arguments.
+
+    Returns:
+    t (array):
+    The times up to the point at which a wall was reached, as an array even if t is a TimeGrid.
+
+    F (matrix):
+    See RGK.
+    '''
+    F = np.zeros((len(y0), len(t))) #array to store the final values of the dependent variables
+    F[:, 0] = y0 #sets the initial values
+
+    noise = Noise(rng, n_noise, len(t) - 1, block_size) #standard normal values for each step
+
+    for i, (tn, h) in enumerate(Steps(t)): #the current time and time step
+        if F[0, i] <= 0 or F[0, i] >= wall_size:
+            F = F[:, :i + 1]
+            t = t[:i + 1]
+            break
+        F[:, i + 1] = step(tn, F[:, i], h, next(noise)) #sets the next values in F
+
+    PROFILE.count('steps', len(t) - 1)
+    return np.asarray(t), F
+
+def Integrate_chunks(step, n_noise, t, y0, wall_size, rng = None, block_size = 65536, chunk_size = 65536):
+    '''
+    Integrates a single trajectory like Integrate, generating the solution in chunks of chunk_size points as the integration proceeds. Joining the chunks gives the same t and F as Integrate. The last chunk ends with the point at which a wall was reached.
+
+    Arguments:
+    chunk_size (int):
+    The number of points in each chunk, except the last which may be shorter. Default 65536.
+
+    See Integrate for other arguments.
+
+    Generates:
+    t (array):
+    The times of the points in the chunk.
+
+    F (matrix):
+    The values of the dependent variables at those times, stacked vertically like RGK.
+    '''
+    y = np.array(y0, dtype = float) #the current values of the dependent variables
+    F = np.empty((len(y0), chunk_size)) #the current chunk
+    F[:, 0] = y
+    j = 1 #number of points in the current chunk
+    start = 0 #index of the first point of the current chunk
+
+    noise = Noise(rng, n_noise, len(t) - 1, block_size) #standard normal values for each step
+
+    for tn, h in Steps(t): #the current time and time step
+        if y[0] <= 0 or y[0] >= wall_size:
+            break
+        if j == chunk_size:
+            yield np.asarray(t[start:start + j]), F
+            F = np.empty((len(y0), chunk_size)) #the chunk handed out is not reused
+            start += j
+            j = 0
+        y = step(tn, y, h, next(noise))
+        F[:, j] = y
+        j += 1
+
+    PROFILE.count('steps', start + j - 1)
+    yield np.asarray(t[start:start + j]), F[:, :j]
+
+def Crossing(y0, y1, h, wall_size, tol = 1e-12):
+    '''
+    Finds when within a time step the particle reached a wall. The position over the step is interpolated with the cubic Hermite polynomial through the positions and velocities at both ends (the velocity is the derivative of the position, so the path is smooth), and the time at which it reaches the wall is found by bisection.
+
+    Arguments:
+    y0, y1 (arrays):
+    The values of the dependent variables (position, velocity) at the start of the step, where the particle is between the walls, and at the end of the step, where it is at or past a wall. May have one column per trial.
+
+    h (float):
+    The time step.
+
+    wall_size (float):
+    See RGK.
+
+    tol (float):
+    The accuracy of the result, as a fraction of the time step. Default 1e-12.
+
+    Returns:
+    s (float or array):
+    The fraction of the time step, between 0 and 1, after which the wall was reached. The crossing time is t + s*h.
+    '''
+    x0 = np.asarray(y0[0], dtype = float)
+    x1 = np.asarray(y1[0], dtype = float)
+    v0 = np.asarray(y0[1], dtype = float)*h
+    v1 = np.asarray(y1[1], dtype = float)*h
+    wall = np.where(x1 <= 0, 0.0, wall_size) #the wall which was reached
+    side = np.where(x1 <= 0, -1.0, 1.0) #side*(x - wall) >= 0 once the wall is reached
+
+    lo = np.zeros(np.shape(x1))
+    hi = np.ones(np.shape(x1))
+    for i in range(int(np.ceil(-np.log2(tol)))):
+        s = (lo + hi)/2
+        x = (2*s**3 - 3*s**2 + 1)*x0 + (s**3 - 2*s**2 + s)*v0 + (3*s**2 - 2*s**3)*x1 + (s**3 - s**2)*v1
+        past = side*(x - wall) >= 0
+        hi = np.where(past, s, hi)
+        lo = np.where(past, lo, s)
+
+    return hi if np.ndim(hi) else float(hi)
+
+def Exit(t, x, v, wall_size, crossing = 'grid'):
+    '''
+    Finds when and where a trajectory which stopped at the first wall it reached (see Integrate) did so.
+
+    Arguments:
+    t, x, v (arrays):
+    The times, positions, and velocities of the trajectory. Only the last two points are used.
+
+    crossing (string):
+    'grid' or 'interpolate'. See Integrate_ensemble. Default 'grid'.
+
+    See RGK for other arguments.
+
+    Returns:
+    t_exit, side:
+    See Integrate_first_passage.
+    '''
+    if 0 < x[-1] < wall_size:
+        return t[-1], None
+    side = 0 if x[-1] <= 0 else wall_size
+    if crossing == 'interpolate' and len(t) > 1: #locates the crossing within the last step
+        h = t[-1] - t[-2]
+        return t[-2] + h*Crossing([x[-2], v[-2]], [x[-1], v[-1]], h, wall_size), side
+    return t[-1], side
+
+def Integrate_ensemble(step, n_noise, t, y0, wall_size, trials, rng = None, block_size = 65536, crossing = 'grid'):
+    '''
+    Integrates many independent trajectories over the times t at once. All trials are stored in a single (len(y0), trials) array, and step is applied to every trial which has not reached a wall yet.
+
+    Arguments:
+    step, n_noise:
+    See RK4_step. step must accept arrays with one column per trial.
+
+    rng (numpy Generator or RandomState, or list of them):
+    See Noise. With one generator per trial, every trial gets exactly the values it would get from Integrate with the same generator.
+
+    block_size (int):
+    See Noise.
+
+    crossing (string):
+    How the exit times are found. 'grid' gives the first time in t at which a trial was at or past a wall, which can be late by up to a full time step. 'interpolate' locates the crossing within the step (see Crossing), so much larger time steps give the same exit times. Default 'grid'.
+
+    See RGK_ensemble for other arguments.
+
+    Returns:
+    t_exit, F, hit:
+    See RGK_ensemble.
+    '''
+    if crossing not in ('grid', 'interpolate'):
+        raise ValueError("crossing must be 'grid' or 'interpolate', not {!r}" .format(crossing))
+
+    F = np.zeros((len(y0), trials)) #array to store the current values of every trial
+    F[:, :] = np.reshape(y0, (len(y0), 1)) #sets the initial values
+
+    t_exit = np.full(trials, float(t[-1])) #trials which never hit a wall finish at the last time
+    hit = np.zeros(trials, dtype = bool)
+    active = np.arange(trials) #indices of the trials which have not been absorbed yet
+    noise = Noise(rng, n_noise, len(t) - 1, block_size, trials) #values are drawn for absorbed trials too, so every trial sees the same values
+
+    n_steps = 0 #the number of steps taken by all trials
+    for tn, h in Steps(t): #the current time and time step
+        out = (F[0, active] <= 0) | (F[0, active] >= wall_size)
+        if out.any():
+            t_exit[active[out]] = tn #absorbs the trials which hit a wall
+            hit[active[out]] = True
+            active = active[~out]
+            if len(active) == 0:
+                break
+        z = next(noise)
+        if z is not None:
+            z = z[:, active]
+        y = F[:, active] #the values at the start of the step
+        F[:, active] = step(tn, y, h, z) #sets the next values in F
+        n_steps += len(active)
+
+        if crossing == 'interpolate':
+            out = (F[0, active] <= 0) | (F[0, active] >= wall_size)
+            if out.any():
+                t_exit[active[out]] = tn + h*Crossing(y[:, out], F[:, active[out]], h, wall_size)
+                hit[active[out]] = True
+                active = active[~out]
+                if len(active) == 0:
+                    break
+
+    #trials which reached a wall on the last time step
+    out = (F[0, active] <= 0) | (F[0, active] >= wall_size)
+    hit[active[out]] = True
+    PROFILE.count('steps', n_steps)
+
+    return t_exit, F, hit
+
+def Integrate_first_passage(step, n_noise, t, y0, wall_size, rng = None, block_size = 65536, crossing = 'grid'):
+    '''
+    Integrates a single trajectory over the times t like Integrate, keeping only the current values of the dependent variables.
+
+    Arguments:
+    crossing (string):
+    'grid' or 'interpolate'. See Integrate_ensemble. Default 'grid'.
+
+    See Integrate for other arguments.
+
+    Returns:
+    t_exit (float):
+    The time at which the trajectory first reached a wall, or t[-1] if it never did.
+
+    side (float):
+    The wall which was reached, 0 or wall_size. None if no wall was reached.
+
+    y (array):
+    The final values of the dependent variables.
+    '''
+    if crossing not in ('grid', 'interpolate'):
+        raise ValueError("crossing must be 'grid' or 'interpolate', not {!r}" .format(crossing))
+    y = np.array(y0, dtype = float) #the current values of the dependent variables
+    noise = Noise(rng, n_noise, len(t) - 1, block_size) #standard normal values for each step
+
+    for i, (tn, h) in enumerate(Steps(t)): #the current time and time step
+        if y[0] <= 0 or y[0] >= wall_size:
+            PROFILE.count('steps', i)
+            return tn, (0 if y[0] <= 0 else wall_size), y
+        yn1 = step(tn, y, h, next(noise))
+        if crossing == 'interpolate' and (yn1[0] <= 0 or yn1[0] >= wall_size):
+            PROFILE.count('steps', i + 1)
+            return tn + h*Crossing(y, yn1, h, wall_size), (0 if yn1[0] <= 0 else wall_size), yn1
+        y = yn1
+
+    PROFILE.count('steps', len(t) - 1)
+    if y[0] <= 0 or y[0] >= wall_size: #reached a wall on the last time step
+        return t[-1], (0 if y[0] <= 0 else wall_size), y
+    return t[-1], None, y
+
+def Integrate_splitting(step, n_noise, t, y0, wall_size, levels = 10, particles = 1000, rng = None, block_size = 65536, crossing = 'grid', importance = None):
+    '''
+    Estimates the probability that a trajectory reaches a wall before t[-1], and the times at which it does, when this is too rare to find by running independent trajectories (fixed effort multilevel splitting). The importance of the states (how far they are from reaching a wall, see importance), from its starting value down to 0, is split into levels equal parts. In each stage, particles trajectories are integrated (as in Integrate_ensemble) from states picked at random from those which reached the previous level, until they reach the next level or the last time. The fraction which reach it estimates the probability of reaching the next level from the previous one, and the probability of reaching a wall is the product of these fractions. Each state is the position, velocity, and time step, so the trajectories which are continued keep their own time. The exit times found in the last stage are a sample of the exit times of the trajectories which reach a wall before t[-1].
+
+    Arguments:
+    step, n_noise:
+    See RK4_step. step must accept arrays with one column per particle. The Langevin equation does not depend on time, so the particles can be stepped together even though their times differ.
+
+    t (array):
+    The times, with equal time steps.
+
+    levels (int):
+    The number of stages. More levels make each stage likelier to succeed. Default 10.
+
+    particles (int):
+    The number of trajectories integrated in each stage. Default 1000.
+
+    rng (numpy Generator or RandomState):
+    See Noise. Also used to pick the states which are continued. If None, the global numpy.random state is used.
+
+    crossing (string):
+    See Integrate_ensemble. Only used for the walls. Default 'grid'.
+
+    importance (function):
+    Takes the values of the dependent variables (with one column per particle) and the number of time steps left until t[-1], and returns how far each particle is from reaching a wall, 0 at a wall. The closer it follows the chance of reaching a wall in the time left, the fewer particles are needed (see Splitting_importance). If None, the distance to the nearer wall is used. Default None.
+
+    See Integrate for other arguments.
+
+    Returns:
+    t_exit (array):
+    The times at which the trajectories of the last stage reached a wall.
+
+    weight (float):
+    The probability each time in t_exit stands for. The probability of reaching a wall before t[-1] is weight*len(t_exit), and weight times the histogram of t_exit estimates the histogram of the exit times of all trajectories.
+
+    probs (array):
+    The fraction of trajectories which reached the next level in each stage.
+    '''
+    if crossing not in ('grid', 'interpolate'):
+        raise ValueError("crossing must be 'grid' or 'interpolate', not {!r}" .format(crossing))
+    n_steps = len(t) - 1
+    h = (float(t[-1]) - float(t[0]))/n_steps
+    if importance is None:
+        importance = lambda y, left: np.minimum(y[0], wall_size - y[0])
+    if y0[0] <= 0 or y0[0] >= wall_size:
+        return np.full(particles, float(t[0])), 1/particles, np.ones(levels)
+    d0 = float(importance(np.reshape(y0, (len(y0), 1)), np.array([n_steps]))[0]) #the starting importance
+
+    Y = np.zeros((len(y0), particles)) #the current values of every particle
+    Y[:, :] = np.reshape(y0, (len(y0), 1))
+    k = np.zeros(particles, dtype = int) #the current time step of every particle
+    probs = []
+    n_total = 0 #the number of steps taken by all particles
+    for j in range(1, levels + 1):
+        level = d0*(1 - j/levels) #the distance to a wall which must be reached in this stage
+        last = j == levels
+        reached = np.zeros(particles, dtype = bool)
+        t_exit = np.zeros(particles)
+        active = np.arange(particles)
+        noise = Noise(rng, n_noise, n_steps, block_size, particles)
+        while len(active):
+            x = Y[0, active]
+            done = (x <= 0) | (x >= wall_size) if last else importance(Y[:, active], n_steps - k[active]) <= level
+            reached[active[done]] = True
+            t_exit[active[done]] = t[0] + k[active[done]]*h
+            active = active[~done & (k[active] < n_steps)] #particles at the last time without reaching the level have failed
+            if len(active) == 0:
+                break
+            z = next(noise)
+            if z is not None:
+                z = z[:, active]
+            y = Y[:, active]
+            Y[:, active] = step(t[0], y, h, z)
+            k[active] += 1
+            n_total += len(active)
+            if last and crossing == 'interpolate':
+                out = (Y[0, active] <= 0) | (Y[0, active] >= wall_size)
+                if out.any():
+                    t_exit[active[out]] = t[0] + (k[active[out]] - 1)*h + h*Crossing(y[:, out], Y[:, active[out]], h, wall_size)
+                    reached[active[out]] = True
+                    active = active[~out]
+
+        hits = np.flatnonzero(reached)
+        probs.append(len(hits)/particles)
+        if last or len(hits) == 0:
+            break
+        pick = hits[(np.asarray((np.random if rng is None else rng).random(particles))*len(hits)).astype(int)] #the states which are continued
+        Y = Y[:, pick]
+        k = k[pick]
+
+    PROFILE.count('steps', n_total)
+    probs = np.array(probs + [0.0]*(levels - len(probs)))
+    if not last or len(hits) == 0:
+        return np.zeros(0), 0.0, probs
+    return t_exit[hits], float(np.prod(probs[:-1]))/particles, probs
+
+def Splitting_importance(vals, D, wall_size, t):
+    '''
+    Builds the importance function for Integrate_splitting from the exact motion of the particle without walls (see OU_coeffs). Without walls, the position at t[-1] of a particle at x with velocity v and a time s left is normal, with mean x + b*v and variance Vx, and a particle whose position at t[-1] would be past a wall reached it before with about twice that probability (reflection principle). So
+        d/sqrt(2*Vx)
+    is used, where d is the distance from x + b*v to the nearer wall (0 if it is past a wall). It is 0 at a wall, and grows as the time left runs out, so a particle which gets close to a wall too late does not count as progress. If D is 0, the distance to the nearer wall is used instead.
+
+    Arguments:
+    t (array):
+    The times, with equal time steps.
+
+    See Control_grad for other arguments. gamma may be 0.
+
+    Returns:
+    importance (function):
+    See Integrate_splitting.
+    '''
+    if D <= 0:
+        return lambda y, left: np.minimum(y[0], wall_size - y[0])
+    n_steps = len(t) - 1
+    h = (float(t[-1]) - float(t[0]))/n_steps
+    coeffs = np.array([OU_coeffs(i*h, vals[0], vals[1], D) if i else (1, 0, 0, 0, 0) for i in range(n_steps + 1)]) #for every number of steps left
+    b = coeffs[:, 1]
+    spread = np.sqrt(2*(coeffs[:, 3]**2 + coeffs[:, 4]**2))
+
+    def importance(y, left):
+        x = y[0] + b[left]*y[1] #the mean position at t[-1]
+        d = np.maximum(np.minimum(x, wall_size - x), 0)
+        d = np.where((y[0] <= 0) | (y[0] >= wall_size), 0, d)
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            return np.where(d > 0, d/spread[left], 0)
+
+    return importance
+
+class BrownianPath(object):
+    '''
+    The Wiener process W(t) behind the random force of an adaptive integration (see Integrate_adaptive), handed out one increment at a time. An increment which was drawn but not used (because its step was rejected) is put back, and a shorter step then takes part of it using the Brownian bridge, so the path does not depend on which steps were rejected.
+
+    Arguments:
+    rng (numpy Generator or RandomState):
+    See Noise.
+
+    block_size (int):
+    The number of standard normal values drawn at once. See Noise. Default 65536.
+    '''
+    def __init__(self, rng = None, block_size = 65536):
+        self.rng = np.random if rng is None else rng
+        self.block_size = block_size
+        self.block = np.empty(0)
+        self.j = 0 #index of the next unused value in block
+        self.pending = [] #increments (h, dW) drawn beyond the current time, the next one last
+
+    def normal(self):
+        '''
+        Returns the next standard normal value.
+        '''
+        if self.j == len(self.block):
+            with PROFILE.phase('noise'):
+                self.block = self.rng.standard_normal(self.block_size).tolist() #Python floats are faster to hand out one at a time
+            PROFILE.count('noise_values', self.block_size)
+            self.j = 0
+        self.j += 1
+        return self.block[self.j - 1]
+
+    def increment(self, h):
+        '''
+        Returns the time step actually taken and the increment of W over it. This is h, unless an increment which was put back is shorter than h, in which case that whole increment is returned.
+        '''
+        if not self.pending:
+            return h, np.sqrt(h)*self.normal()
+        hp, dWp = self.pending.pop()
+        if h >= hp*(1 - 1e-12):
+            return hp, dWp
+        dW = dWp*h/hp + np.sqrt(h*(hp - h)/hp)*self.normal() #Brownian bridge from 0 to dWp, at h
+        self.pending.append((hp - h, dWp - dW))
+        return h, dW
+
+    def put_back(self, h, dW):
+        '''
+        Returns an increment from increment which was not used, so that the next steps use it.
+        '''
+        self.pending.append((h, dW))
+
+def RK45_step(fun, tn, yn, h, vals):
+    '''
+    Takes a single step of the Dormand-Prince Runge-Kutta method, which has an embedded fourth order solution for the error estimate.
+
+    Arguments:
+    See RGK and Integrate.
+
+    Returns:
+    yn1 (list):
+    The fifth order solution at tn + h.
+
+    err (list):
+    The estimated error of yn1.
+    '''
+    c = [0, 1/5, 3/10, 4/5, 8/9, 1]
+    A = [[],
+         [1/5],
+         [3/40, 9/40],
+         [44/45, -56/15, 32/9],
+         [19372/6561, -25360/2187, 64448/6561, -212/729],
+         [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656]]
+    B = [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84] #fifth order weights
+    E = [71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40] #fifth minus fourth order weights
+
+    n = len(yn)
+    yn = [float(y) for y in yn] #Python floats are much faster than small arrays
+    k = []
+    for i in range(6):
+        y = [yn[j] + h*sum(a*kj[j] for a, kj in zip(A[i], k)) for j in range(n)]
+        k.append(fun(tn + c[i]*h, y, vals))
+    yn1 = [yn[j] + h*sum(b*kj[j] for b, kj in zip(B, k)) for j in range(n)]
+    k.append(fun(tn + h, yn1, vals))
+    err = [h*sum(e*kj[j] for e, kj in zip(E, k)) for j in range(n)]
+
+    return yn1, err
+
+def Integrate_adaptive(fun, vals, D, t_t, y0, wall_size, h_max, rng = None, tol = 1e-6, h_min = None, eta = 0.1, block_size = 65536, keep = True):
+    '''
+    Integrates a single trajectory of the Langevin equation m dv/dt = -gamma*v + F(t) (see OU_coeffs) with adaptive time steps. The deterministic part is integrated with RK45_step, and steps whose error estimate is above tol are rejected and retried with a smaller step. The step is also limited to eta times the time the particle needs to reach the nearest wall, so steps are large far from the walls and refined close to them. The random force adds sqrt(2*D)/m times the increment of a Brownian path (see BrownianPath) to the velocity after each step.
+
+    Arguments:
+    fun, vals:
+    See RGK.
+
+    D (float):
+    See OU_coeffs. If 0, there is no random force.
+
+    t_t (float):
+    The total time of the integration.
+
+    y0, wall_size:
+    See RGK.
+
+    h_max (float):
+    The largest time step.
+
+    rng (numpy Generator or RandomState):
+    See Noise.
+
+    tol (float):
+    The error tolerance of the deterministic part of each step, relative to the size of the values (but at least tol). Default 1e-6.
+
+    h_min (float):
+    The smallest time step. Steps are not refined below it near the walls, and steps of this size are accepted whatever their error. Default h_max/100.
+
+    eta (float):
+    The fraction of the time needed to reach the nearest wall at the current speed (plus the thermal speed) that a step may be. Default 0.1.
+
+    block_size (int):
+    See BrownianPath.
+
+    keep (bool):
+    If False, only the last two points are kept (enough to locate a wall crossing, see Crossing), so the memory needed does not depend on the number of steps. Default True.
+
+    Returns:
+    t (array):
+    The times of the accepted steps, from 0 to t_t or until a wall was reached.
+
+    F (matrix):
+    The values of the dependent variables at those times, stacked vertically like RGK.
+
+    stats (dict):
+    The number of accepted ('steps') and rejected ('rejected') steps, and the smallest ('h_min') and largest ('h_max') accepted time steps.
+    '''
+    m = vals[0]
+    gamma = vals[1]
+    sigma = np.sqrt(2*D)/m #velocity change per unit increment of W
+    v_th = np.sqrt(D/(m*gamma)) if gamma > 0 else sigma #thermal speed
+    if h_min is None:
+        h_min = h_max/100
+    W = BrownianPath(rng, block_size)
+
+    y = [float(y) for y in y0] #the current values of the dependent variables
+    tn = 0.0
+    ts = [tn]
+    F = [y]
+    stats = {'steps': 0, 'rejected': 0, 'h_min': np.inf, 'h_max': 0.0}
+    h = h_max
+
+    while t_t - tn > 1e-12*t_t and 0 < y[0] < wall_size:
+        d = min(y[0], wall_size - y[0]) #distance to the nearest wall
+        speed = abs(y[1]) + v_th
+        if speed > 0:
+            h = min(h, eta*d/speed) #refines near the walls
+        h = min(max(h, h_min), h_max, t_t - tn)
+        if D > 0:
+            h, dW = W.increment(h)
+
+        yn1, err = RK45_step(fun, tn, y, h, vals)
+        err = max(abs(e)/(tol*(1 + abs(yj))) for e, yj in zip(err, y))
+        if err > 1 and h > h_min: #rejects the step and retries with a smaller one
+            if D > 0:
+                W.put_back(h, dW)
+            stats['rejected'] += 1
+            h = max(h*max(0.2, 0.9*err**-0.2), h_min)
+            continue
+
+        if D > 0:
+            yn1[1] += sigma*dW
+        tn += h
+        y = yn1
+        ts.append(tn)
+        F.append(y)
+        if not keep and len(ts) > 2:
+            del ts[0], F[0]
+        stats['steps'] += 1
+        stats['h_min'] = min(stats['h_min'], float(h))
+        stats['h_max'] = max(stats['h_max'], float(h))
+        h = h*min(5, 0.9*err**-0.2) if err > 0 else 5*h #the next step tried
+
+    PROFILE.count('steps', stats['steps'])
+    return np.array(ts), np.array(F).T, stats
+
+def ODE(t, x0, vals, out = None):
+    '''
+    Takes a time, position, and velocity, and returns the velocity and acceleration for 1D Brownian motion with no random force.
+
+    Arguments:
+    t (float):
+    The current time.
+
+    x0 (list or array):
+    The first input should be the position, and the second input should be the velocity.
+
+    vals (list or array):
+    The Brownian motion parameters. The first input should be mass, the second input should be the damping coefficient (gamma) (all in SI units).
+
+    out (list or array):
+    If given, the velocity and acceleration are written into out instead of a new list (see RK4_step_inplace). Default None.
+
+    Returns:
+    [dxdt, dvdt] (list):
+    The velocity and acceleration at the specified time, position, and velocity. If out is given, out is returned.
+    '''
+    x = x0[0]
+    v = x0[1]
+    m = vals[0]
+    gamma = vals[1]
+    
+    dxdt = v #position is the derivative of velocity
+    dvdt = -gamma*v/m #Langevin value for acceleration
+
+    if out is not None:
+        out[0] = dxdt
+        out[1] = dvdt
+        return out
+    return [dxdt, dvdt]
+
+class TimeGrid(object):
+    '''
+    A uniform grid of times which is computed when asked for instead of being stored, so it needs no memory however many time steps it has. Gives exactly the same times as numpy.linspace(start, stop, num), and can be used like that array: it has a length, can be indexed and iterated over, and numpy.asarray(grid) gives the array. Slicing from the start (grid[:n]) gives a shorter TimeGrid, other slices give arrays.
+
+    Arguments:
+    start, stop (floats):
+    The first and last time.
+
+    num (int):
+    The number of times, including start and stop.
+
+    n (int):
+    Only the first n times are used, for a grid which was cut short (e.g. when a wall was hit). If None, all num times are used, which is the default.
+    '''
+    def __init__(self, start, stop, num, n = None):
+        self.start = float(start)
+        self.stop = float(stop)
+        self.num = int(num)
+        self.n = self.num if n is None else int(n)
+        self.dt = (self.stop - self.start)/(self.num - 1) if self.num > 1 else 0.0 #the time step
+
+    def time(self, i):
+        '''
+        Returns the i-th time (0 <= i < num), computed the same way as numpy.linspace.
+        '''
+        if i == self.num - 1 and i > 0:
+            return self.stop
+        return i*self.dt + self.start
+
+    def steps(self):
+        '''
+        Generates the time and the time step (t[i], t[i + 1] - t[i]) of every step of the grid.
+        '''
+        tn = self.start
+        for i in range(1, self.n):
+            tn1 = self.time(i)
+            yield tn, tn1 - tn
+            tn = tn1
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self.n)
+            if start == 0 and step == 1:
+                return TimeGrid(self.start, self.stop, self.num, max(stop, 0))
+            return self.times(np.arange(start, stop, step))
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError('TimeGrid index out of range')
+        return self.time(i)
+
+    def times(self, i):
+        '''
+        Returns an array of the times with the indices in the array i.
+        '''
+        t = i*self.dt + self.start
+        if self.num > 1:
+            t[i == self.num - 1] = self.stop
+        return t
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self.time(i)
+
+    def __array__(self, dtype = None, copy = None):
+        t = self.times(np.arange(self.n))
+        return t if dtype is None else t.astype(dtype)
+
+    def __repr__(self):
+        return 'TimeGrid({!r}, {!r}, {!r}, n = {!r})' .format(self.start, self.stop, self.num, self.n)
+
+def Steps(t):
+    '''
+    Generates the time and the time step (t[i], t[i + 1] - t[i]) of every step over the times t, which may be a TimeGrid or an array of any (not necessarily uniform) times.
+    '''
+    if isinstance(t, TimeGrid):
+        yield from t.steps()
+    else:
+        for i in range(len(t) - 1):
+            yield t[i], t[i + 1] - t[i]
+
+def params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda, rand = 'yes'):
+    '''
+    Takes Brownian motion parameters and converts them into the format to be used in RGK. All parameters are in reduced units.
+    
+    Arguments:
+    t_t (float):
+    The total time for the simulation.
+    
+    dt (float):
+    The time step for the simulation.
+    
+    init_pos (float):
+    The initial position of the particle.
+    
+    init_vel (float):
+    The initial velocity of the particle.
+    
+    m (float):
+    The mass of the particle.
+    
+    gamma (float):
+    The damping coefficient of the particle in the fluid.
+    
+    T (float):
+    The temperature of the system.
+    
+    Lambda (float):
+    A scaling parameter for the standard deviation of the random force. Default 1e-20.
+	
+    rand:
+    If None, the random function is disabled.
+	
+    Returns:
+    t (array):
+    An array which contains the times.
+    
+    rand (array):
+    An array which contains the random variable parameters.
+    
+    vals (array):
+    An array which contains m in the first position and gamma in the second position.
+    
+    x0 (array):
+    An array which contains init_pos in the first position and init_vel in the second position.
+    '''
+    t = TimeGrid(0, t_t, int(t_t//dt + 1)) #starts at 0 and ends at t_t, the same times as np.linspace
+    if rand != None:
+        rand = [1, 0, np.sqrt(2*1*T*Lambda*dt)] #Adds to velocity, centered at 0, standard deviation of sqrt(2k_B*T*lambda*(t - t'))
+                                                #Note that kB = 1 in reduced units
+    vals = [m, gamma] #mass and damping coefficient
+    x0 = [init_pos, init_vel] #initial position and velocity
+    	
+    return t, rand, vals, x0
+
+def Langevin(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1e-20, rand = 'yes', rng = None, method = 'rk4', block_size = 65536, tol = 1e-6, stats = None):
+    '''
+    Takes Brownian motion parameters and outputs the time, position, and velocity arrays.
+    
+    Arguments:
+    method (string):
+    The integration method, 'rk4', 'ou', 'em', 'heun', or 'baoab' (see Stepper), or 'adaptive' for adaptive time steps of at most dt, refined near the walls (see Integrate_adaptive). Default 'rk4'.
+
+    block_size (int):
+    The number of random values drawn at once. See Noise. Default 65536.
+
+    tol (float):
+    The error tolerance of each step for method 'adaptive'. See Integrate_adaptive. Default 1e-6.
+
+    stats (dict):
+    If given and method is 'adaptive', it is updated with the number of steps taken and rejected (see Integrate_adaptive). Default None.
+
+    See RGK
+    See params
+    
+    Returns:
+    t (array)
+    An array which contains the times.
+    
+    x (array):
+    An array which contains the positions.
+    
+    v (array):
+    An array which contains the velocities.
+    '''
+    t, rand, vals, x0 = params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda)
+
+    D = T*Lambda if rand is not None else 0 #strength of the random force
+    with PROFILE.phase('integrate'):
+        if method == 'adaptive':
+            t, ans, run = Integrate_adaptive(ODE, vals, D, t_t, x0, wall_size, dt, rng, tol, block_size = block_size)
+            if stats is not None:
+                stats.update(run)
+        else:
+            step, n_noise = Stepper(method, vals, rand, D)
+            t, ans = Integrate(step, n_noise, t, x0, wall_size, rng, block_size)
+    x = ans[0, :]
+    v = ans[1, :]
+
+    return t, x, v
+
+def Langevin_chunks(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1e-20, rand = 'yes', rng = None, method = 'rk4', block_size = 65536, chunk_size = 65536):
+    '''
+    Takes Brownian motion parameters and generates the time, position, and velocity arrays in chunks as the simulation runs, so very long simulations never have to be held in memory at once. Joining the chunks gives the same arrays as Langevin. The chunks can be passed directly to Save_chunks.
+
+    Arguments:
+    chunk_size (int):
+    The number of points in each chunk. Default 65536.
+
+    See Langevin for other arguments. With method 'adaptive', the whole trajectory is generated as a single chunk.
+
+    Generates:
+    t, x, v (arrays):
+    The times, positions, and velocities of the points in the chunk.
+    '''
+    if method == 'adaptive':
+        yield Langevin(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda, rand, rng, method, block_size)
+        return
+    t, rand, vals, x0 = params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda)
+
+    D = T*Lambda if rand is not None else 0 #strength of the random force
+    step, n_noise = Stepper(method, vals, rand, D)
+
+    for t_chunk, F in PROFILE.timed(Integrate_chunks(step, n_noise, t, x0, wall_size, rng, block_size, chunk_size), 'integrate'):
+        yield t_chunk, F[0, :], F[1, :]
+
+def FirstPassage(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1e-20, rand = 'yes', rng = None, method = 'rk4', block_size = 65536, crossing = 'grid', tol = 1e-6, stats = None):
+    '''
+    Takes Brownian motion parameters and outputs when and where the particle first hit a wall. Gives the same result as the last values of Langevin with the same random numbers, but only the current position and velocity are kept, so the memory needed does not depend on t_t/dt.
+
+    Arguments:
+    crossing (string):
+    'grid' or 'interpolate'. With 'interpolate', the time within the last step at which the wall was reached is returned instead of the end of that step (see Integrate_ensemble). Default 'grid'.
+
+    See Langevin for other arguments.
+
+    Returns:
+    t_exit (float):
+    The time at which the particle first hit a wall, or the last time if it never did.
+
+    side (float):
+    The wall which was hit, 0 or wall_size. None if no wall was hit.
+
+    v (float):
+    The final velocity of the particle.
+    '''
+    t, rand, vals, x0 = params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda)
+
+    D = T*Lambda if rand is not None else 0 #strength of the random force
+    if method == 'adaptive':
+        with PROFILE.phase('integrate'):
+            t, F, run = Integrate_adaptive(ODE, vals, D, t_t, x0, wall_size, dt, rng, tol, block_size = block_size, keep = False)
+        if stats is not None:
+            stats.update(run)
+        t_exit, side = Exit(t, F[0, :], F[1, :], wall_size, crossing)
+        return t_exit, side, F[1, -1]
+    step, n_noise = Stepper(method, vals, rand, D)
+
+    with PROFILE.phase('integrate'):
+        t_exit, side, y = Integrate_first_passage(step, n_noise, t, x0, wall_size, rng, block_size, crossing)
+
+    return t_exit, side, y[1]
+
+def Splitting(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1e-20, rand = 'yes', rng = None, method = 'rk4', block_size = 65536, crossing = 'grid', levels = 10, particles = 1000):
+    '''
+    Takes Brownian motion parameters and estimates the probability that the particle hits a wall before t_t, and the times at which it does, with multilevel splitting (see Integrate_splitting), using levels of Splitting_importance. Much cheaper than running independent trials when hitting a wall before t_t is rare.
+
+    Arguments:
+    method (string):
+    The integration method (see Stepper). 'adaptive' cannot be used. Default 'rk4'.
+
+    See Integrate_splitting and Langevin for other arguments.
+
+    Returns:
+    t_exit, weight, probs:
+    See Integrate_splitting.
+    '''
+    if method == 'adaptive':
+        raise ValueError("method = 'adaptive' takes different time steps in every trial, so it cannot be used for splitting")
+    t, rand, vals, x0 = params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda)
+
+    D = T*Lambda if rand is not None else 0 #strength of the random force
+    step, n_noise = Stepper(method, vals, rand, D)
+
+    with PROFILE.phase('integrate'):
+        return Integrate_splitting(step, n_noise, t, x0, wall_size, levels, particles, rng, block_size, crossing, Splitting_importance(vals, D, wall_size, t))
+
+def FokkerPlanck(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1, nx = 400, nv = 60, v_max = None):
+    '''
+    Takes Brownian motion parameters and calculates the probability that the particle has not hit a wall yet (the survival probability) at every time, without random trials, by solving the Kramers (Fokker-Planck) equation for the probability density p(x, v, t) of the position and velocity:
+        dp/dt = -v*dp/dx + d/dv(gamma/m*v*p + D/m**2*dp/dv)
+    with D = T*Lambda (see OU_coeffs), and absorbing walls: no particles enter from the walls, so p = 0 at x = 0 for v > 0 and at x = wall_size for v < 0. This is the random force of the methods 'ou', 'em', 'heun', 'baoab', and 'adaptive' (see Stepper), whose histograms it can be compared with. It does not describe method 'rk4', whose random force is much weaker and shrinks with dt. The equation is solved with finite volumes on an nx by nv grid, upwind in x (which gives the absorbing walls) and central in v, with no flux through v = -v_max and v_max. Time steps of dt are taken with the Crank-Nicolson method, after two backward Euler steps which damp the start from a single point. The sparse linear systems are factorized once, so finer grids scale to many time steps. Needs scipy, which is only imported here.
+
+    Arguments:
+    nx, nv (ints):
+    The number of grid cells in x and v. The error of the upwind scheme shrinks in proportion to 1/nx, so nx matters most; nv should be at least 40. Default 400 and 60.
+
+    v_max (float):
+    The largest speed on the grid. If None, |init_vel| plus 6 standard deviations of the velocity at t_t (see OU_coeffs). Default None.
+
+    See params for other arguments.
+
+    Returns:
+    t (array):
+    The times, the same as those of Langevin and Hist.
+
+    S (array):
+    The probability that the particle has not hit a wall by each time.
+
+    density (array):
+    The probability density of the time at which the particle hits a wall, -dS/dt, at each time. The probability of hitting a wall between two times t1 and t2 is S(t1) - S(t2), e.g. for each bin of a Hist histogram with np.interp(edges, t, S).
+    '''
+    try:
+        import scipy.sparse as sparse #imported only when needed, as it is not needed otherwise
+        import scipy.sparse.linalg
+    except ImportError as error:
+        raise ImportError("FokkerPlanck (and the fp command) needs scipy, which is not installed: pip install scipy, or pip install 'Langevin[fp]'") from error
+
+    t = np.asarray(params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda)[0])
+    D = T*Lambda
+    if not 0 < init_pos < wall_size:
+        return t, np.zeros(len(t)), np.zeros(len(t))
+    if v_max is None:
+        sv = OU_coeffs(t_t, m, gamma, D)[2] #the standard deviation of the velocity at t_t
+        v_max = abs(init_vel) + 6*sv if sv > 0 else 2*abs(init_vel) + 1
+
+    dx = wall_size/nx
+    dv = 2*v_max/nv
+    x = (np.arange(nx) + 0.5)*dx #cell centers
+    v = -v_max + (np.arange(nv) + 0.5)*dv
+    k = gamma/m
+    q = D/m**2
+
+    #transport in x, upwind: cells with v > 0 take from the cell on their left, cells with v < 0 from the cell on their right, and nothing comes in from the walls
+    vp = sparse.diags(np.maximum(v, 0))
+    vm = sparse.diags(np.minimum(v, 0))
+    left = sparse.eye(nx) - sparse.eye(nx, k = -1)
+    right = sparse.eye(nx, k = 1) - sparse.eye(nx)
+    A = -(sparse.kron(left, vp) + sparse.kron(right, vm))/dx
+
+    #friction and random force in v, through the faces between cells, with no flux through the outer faces
+    vf = -v_max + np.arange(1, nv)*dv #the inner faces
+    #cell j gains k*vf*(p[j] + p[j + 1])/2 + q*(p[j + 1] - p[j])/dv through face j + 1/2 and loses the same through face j - 1/2
+    up = (k*vf/2 + q/dv)/dv #from p[j + 1]
+    down = (k*vf/2 - q/dv)/dv #from p[j]
+    B = sparse.diags([np.append(down, 0) - np.append(0, up), up, -down], [0, 1, -1])
+    L = (A + sparse.kron(sparse.eye(nx), B)).tocsc()
+
+    #the starting point, shared between the four nearest cell centers
+    p = np.zeros((nx, nv))
+    fi = np.clip((init_pos - x[0])/dx, 0, nx - 1)
+    fj = np.clip((init_vel - v[0])/dv, 0, nv - 1)
+    i0, j0 = min(int(fi), nx - 2), min(int(fj), nv - 2)
+    wi, wj = fi - i0, fj - j0
+    p[i0:i0 + 2, j0:j0 + 2] = np.outer([1 - wi, wi], [1 - wj, wj])
+    p = p.ravel()
+
+    I = sparse.identity(nx*nv, format = 'csc')
+    h = (t[-1] - t[0])/(len(t) - 1) if len(t) > 1 else 0
+    with PROFILE.phase('integrate'):
+        euler = scipy.sparse.linalg.splu((I - h*L).tocsc(), permc_spec = 'MMD_AT_PLUS_A') #this ordering gives the fewest nonzeros for these matrices
+        cn = scipy.sparse.linalg.splu((I - h/2*L).tocsc(), permc_spec = 'MMD_AT_PLUS_A')
+        explicit = (I + h/2*L).tocsr()
+        S = np.empty(len(t))
+        S[0] = 1.0
+        for n in range(1, len(t)):
+            p = euler.solve(p) if n <= 2 else cn.solve(explicit @ p)
+            S[n] = p.sum()
+    S = np.minimum(S, 1)
+    density = -np.gradient(S, t) if len(t) > 1 else np.zeros(len(t))
+    return t, S, density
+
+class TrajectoryWriter(object):
+    '''
+    Writes times, positions, and velocities to a binary file in chunks, so a trajectory can be saved while it is being integrated without keeping all of it in memory.
+
+    The file is a standard numpy .npy file holding a (number of points, 3) array of float64, with columns t, x, v. It can be read with Load or numpy.load. The header has a fixed size, and the number of points in it is updated every time the file is closed.
+
+    Arguments:
+    FileName (string):
+    The name of the file to be saved (with file extension, normally .npy).
+
+    Example:
+    with TrajectoryWriter('run.npy') as w:
+        for t, x, v in chunks:
+            w.write(t, x, v)
+    '''
+    header_size = 128 #bytes, a multiple of 64 as required by the .npy format
+
+    def __init__(self, FileName):
+        self.FileName = FileName
+        self.n = 0 #number of points written
+        self.nbytes = 0 #number of data bytes written
+        self.file = open(FileName, 'wb')
+        self.file.write(self.header())
+
+    def header(self):
+        '''
+        Returns the .npy header for the points written so far, padded to header_size bytes.
+        '''
+        d = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d, 3), }" % self.n
+        return b'\x93NUMPY\x01\x00' + (self.header_size - 10).to_bytes(2, 'little') + d.ljust(self.header_size - 11).encode('latin1') + b'\n'
+
+    def write(self, t, x, v):
+        '''
+        Appends times, positions, and velocities (arrays of the same length) to the file.
+        '''
+        rows = np.empty((len(x), 3), dtype = '<f8')
+        rows[:, 0] = t
+        rows[:, 1] = x
+        rows[:, 2] = v
+        self.file.write(rows.tobytes())
+        self.n += len(x)
+        self.nbytes += rows.nbytes
+
+    def close(self):
+        '''
+        Writes the final header and closes the file.
+        '''
+        if not self.file.closed:
+            self.file.seek(0)
+            self.file.write(self.header())
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def Save(FileName, t, x, v, p = 'No', fmt = None):
+    '''
+    Takes a file name, times, positions, and velocities, and saves them in a file.
+    
+    Arguments:
+    FileName (string):
+    The name of the file to be saved (with file extension)
+
+    print:
+    If 'No', does not print final position and velocity. Will still save values to a file. Default 'No'.
+    
+    t, x, v (arrays):
+    See Langevin.
+
+    fmt (string):
+    'npy' for a binary file (see TrajectoryWriter), which is much faster to write and read and about 4x smaller. 'txt' for a text file. If None, 'txt' is used if FileName ends in .txt, otherwise 'npy'. Default None.
+
+    Saves:
+    File with times, positions, and velocities. Text files also have indices, and a line with headings for each column.
+
+    Returns:
+    x[-1], v[-1] (floats):
+    The final position and velocity, respectively, of the particle.
+    '''
+    return Save_chunks(FileName, [(t, x, v)], p, fmt)
+
+def Save_chunks(FileName, chunks, p = 'No', fmt = None):
+    '''
+    Saves times, positions, and velocities which arrive in chunks (see Langevin_chunks) in a file, writing each chunk as it arrives. The file is the same as Save would write for the joined arrays.
+
+    Arguments:
+    chunks (iterable):
+    Generates (t, x, v) for each chunk.
+
+    See Save for other arguments.
+
+    Returns:
+    x[-1], v[-1] (floats):
+    The final position and velocity, respectively, of the particle.
+    '''
+    with PROFILE.phase('save'):
+        if fmt is None:
+            fmt = 'txt' if FileName.endswith('.txt') else 'npy'
+
+        if fmt == 'npy':
+            with TrajectoryWriter(FileName) as w:
+                for t, x, v in chunks:
+                    w.write(t, x, v)
+        elif fmt == 'txt':
+            F = open(FileName, 'w')
+            F.write('index, t, x, v\n') #the first line has headings for each column
+            n = 0 #index of the first point in the chunk
+            for t, x, v in chunks:
+                lines = [] #list to store the lines of this chunk
+
+                #stores each set of values
+                for i in range(len(x)):
+                    lines.append(str(n + i) + ' ' + str(t[i]) + ' ' + str(x[i]) + ' ' + str(v[i]) + '\n')
+                F.writelines(lines)
+                n += len(x)
+            F.close()
+        else:
+            raise ValueError("fmt must be 'npy' or 'txt', not {!r}" .format(fmt))
+        if PROFILE.enabled:
+            PROFILE.count('bytes_written', os.path.getsize(FileName))
+
+    #prints the final position and velocity
+    if p != 'No':
+        print('The final particle position is {}' .format(x[-1]))
+        print('The final particle velocity is {}' .format(v[-1]))
+    return x[-1], v[-1]
+
+def Load(FileName, mmap = True):
+    '''
+    Reads times, positions, and velocities saved by Save or TrajectoryWriter.
+
+    Arguments:
+    FileName (string):
+    The name of the file (with file extension). Files ending in .txt are read as text files, all others as binary files.
+
+    mmap (bool):
+    If True, binary files are memory-mapped instead of read, so only the parts which are used are loaded from disk. Default True.
+
+    Returns:
+    t, x, v (arrays):
+    The times, positions, and velocities.
+    '''
+    if FileName.endswith('.txt'):
+        data = np.loadtxt(FileName, skiprows = 1, usecols = (1, 2, 3), ndmin = 2)
+    else:
+        data = np.load(FileName, mmap_mode = 'r' if mmap else None)
+
+    return data[:, 0], data[:, 1], data[:, 2]
+
+class TrajectoryArchive(object):
+    '''
+    Writes the trajectories of many trials to a single binary file, instead of one file per trial. Trajectories are collected in memory and written together once buffer_size points have been collected, so the file is written in a few large pieces. Read the file with Archive.
+
+    The file has a 64 byte header (a magic string and the version), then the points of every trial one after another as a (number of points, 3) array of float64 with columns t, x, v. The index is kept next to it in FileName.idx (int64): the number of trials, the trial numbers, and the position of the first point of each trial, with the total number of points at the end. Every flush first writes the new points after the old ones, then replaces the whole index at once (with os.replace), so if the process dies part way through, the file is still read with the trials of the last flush, and points past them are ignored (and written over when the file is continued with mode 'a').
+
+    Arguments:
+    FileName (string):
+    The name of the file to be saved (with file extension, normally .lta).
+
+    mode (string):
+    'w' to start a new file. 'a' to add to an existing file. Default 'w'.
+
+    keep (int):
+    For mode 'a', only the trials with a trial number below keep are kept, and the rest are removed, as when a run is resumed from a checkpoint. If None, every trial is kept. Default None.
+
+    buffer_size (int):
+    The number of points collected before they are written. Default 2**20.
+
+    Example:
+    with TrajectoryArchive('run.lta') as a:
+        for i, (t, x, v) in enumerate(trajectories):
+            a.append(i, t, x, v)
+    '''
+    magic = b'\x93LANGARC'
+    version = 2
+    header_size = 64 #bytes
+
+    def __init__(self, FileName, mode = 'w', keep = None, buffer_size = 2**20):
+        self.FileName = FileName
+        self.buffer_size = buffer_size
+        self.ids = [] #the trial numbers, in the order they were written
+        self.starts = [0] #the position of the first point of each trial, and one past the last point
+        self.buffer = [] #trajectories which have not been written yet
+        self.buffered = 0 #the number of points in buffer
+        if mode == 'a' and os.path.exists(FileName):
+            old = Archive(FileName)
+            n = len(old.ids) if keep is None else int(np.sum(old.ids < keep))
+            self.ids = old.ids[:n].tolist()
+            self.starts = old.starts[:n + 1].tolist()
+            del old
+            self.file = open(FileName, 'r+b')
+            self.write_index() #the removed trials leave the index before their points are written over
+            self.file.seek(self.header_size + 24*self.starts[-1])
+            self.file.truncate() #removed trials, and points past the last flush
+        elif mode in ['w', 'a']:
+            self.file = open(FileName, 'wb')
+            self.file.write((self.magic + np.array([self.version], dtype = '<i8').tobytes()).ljust(self.header_size, b'\0'))
+            self.write_index()
+        else:
+            raise ValueError("mode must be 'w' or 'a', not {!r}" .format(mode))
+
+    def write_index(self):
+        '''
+        Makes every point written so far reach the disk, then replaces the index with that of the trials written so far. Returns the number of bytes of the index.
+        '''
+        self.file.flush()
+        os.fsync(self.file.fileno()) #the index must never point past the points on disk
+        index = np.array([len(self.ids)] + self.ids + self.starts, dtype = '<i8').tobytes()
+        with open(self.FileName + '.idx.tmp', 'wb') as f:
+            f.write(index)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.FileName + '.idx.tmp', self.FileName + '.idx')
+        return len(index)
+
+    def append(self, i, t, x, v):
+        '''
+        Adds the times, positions, and velocities (arrays of the same length) of trial number i to the file.
+        '''
+        rows = np.empty((len(x), 3), dtype = '<f8')
+        rows[:, 0] = t
+        rows[:, 1] = x
+        rows[:, 2] = v
+        self.buffer.append(rows)
+        self.buffered += len(rows)
+        self.ids.append(i)
+        self.starts.append(self.starts[-1] + len(rows))
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        '''
+        Writes the collected trajectories, then the index, so the file can be read with every trial appended so far.
+        '''
+        with PROFILE.phase('save'):
+            written = 0
+            if self.buffer:
+                rows = np.concatenate(self.buffer).tobytes()
+                self.file.write(rows)
+                written = len(rows)
+            self.buffer = []
+            self.buffered = 0
+            PROFILE.count('bytes_written', written + self.write_index())
+
+    def close(self):
+        '''
+        Writes everything that is left and closes the file.
+        '''
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Archive(object):
+    '''
+    Reads a file written by TrajectoryArchive. The points are memory-mapped, so only the trials which are used are loaded from disk.
+
+    Arguments:
+    FileName (string):
+    The name of the file (with file extension). Its index FileName.idx must be next to it.
+
+    Attributes:
+    ids (array):
+    The trial numbers, in the order they were written.
+
+    starts (array):
+    The position of the first point of each trial in data, and the total number of points at the end.
+
+    data (array):
+    Every point of every trial, as a (number of points, 3) array with columns t, x, v.
+
+    Example:
+    a = Archive('run.lta')
+    t, x, v = a[10] #trial number 10
+    for i, t, x, v in a: #every trial, in the order they were written
+        print(i, x[-1])
+    '''
+    def __init__(self, FileName):
+        self.FileName = FileName
+        with open(FileName, 'rb') as f:
+            header = f.read(TrajectoryArchive.header_size)
+        if not header.startswith(TrajectoryArchive.magic):
+            raise ValueError('{} is not a trajectory archive' .format(FileName))
+        version = int(np.frombuffer(header, dtype = '<i8', count = 1, offset = len(TrajectoryArchive.magic))[0])
+        if version != TrajectoryArchive.version:
+            raise ValueError('{} has archive version {}, not {}' .format(FileName, version, TrajectoryArchive.version))
+        index = np.fromfile(FileName + '.idx', dtype = '<i8')
+        n = int(index[0])
+        self.ids = index[1:n + 1]
+        self.starts = index[n + 1:]
+        points = int(self.starts[-1])
+        self.data = np.memmap(FileName, dtype = '<f8', mode = 'r', offset = TrajectoryArchive.header_size, shape = (points, 3)) if points else np.empty((0, 3))
+        self.position = {i: k for k, i in enumerate(self.ids.tolist())} #where each trial is in the index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def trial(self, k):
+        '''
+        Returns the times, positions, and velocities of the k-th trial in the file (not trial number k, see __getitem__).
+        '''
+        rows = self.data[self.starts[k]:self.starts[k + 1]]
+        return rows[:, 0], rows[:, 1], rows[:, 2]
+
+    def __getitem__(self, i):
+        '''
+        Returns the times, positions, and velocities of trial number i. Raises a KeyError if it is not in the file.
+        '''
+        return self.trial(self.position[i])
+
+    def __iter__(self):
+        '''
+        Generates the trial number, times, positions, and velocities of every trial, in the order they were written.
+        '''
+        for k, i in enumerate(self.ids.tolist()):
+            yield (i,) + self.trial(k)
+
+def trial_rng(seed, i):
+    '''
+    Creates the random number generator for a single trial. Every trial gets its own stream, spawned from one root seed, so a trial draws the same random values no matter which process runs it or in what order.
+
+    Arguments:
+    seed (int):
+    The root seed of the run.
+
+    i (int):
+    The trial number (indexed from 0).
+
+    Returns:
+    rng (numpy Generator):
+    The random number generator for trial i. Identical to the i-th child of numpy.random.SeedSequence(seed).spawn.
+    '''
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key = (i,)))
+
+class Antithetic(object):
+    '''
+    Wraps a random number generator so that it draws the negated standard normal values, for the second trial of an antithetic pair (see Hist). The two trials of a pair are driven by mirror image random forces, so their exit times are negatively correlated and their mean varies less than that of two independent trials.
+
+    Arguments:
+    rng (numpy Generator or RandomState):
+    The random number generator of the first trial of the pair.
+    '''
+    def __init__(self, rng):
+        self.rng = rng
+
+    def standard_normal(self, size = None):
+        return -self.rng.standard_normal(size)
+
+class MeanEstimator(object):
+    '''
+    Estimates the mean time to reach a wall with variance reduction, in constant memory. Values are added for independent units: single trials, or the mean of the two trials of an antithetic pair. Each unit may have a control value c of known mean 0 (see Control_step), and the estimate is then mean(y) - beta*mean(c), with beta = cov(y, c)/var(c) the coefficient which gives the smallest variance. Two MeanEstimators can be merged like ExitStats.
+    '''
+    def __init__(self):
+        self.n = 0 #the number of units
+        self.means = np.zeros(2) #the means of y and c
+        self.M2 = np.zeros((2, 2)) #the sums of products of differences from the means of y and c
+
+    def _combine(self, n, means, M2):
+        '''
+        Combines the count, means, and sums of products of differences of another set of units with these (Chan et al.).
+        '''
+        if n == 0:
+            return
+        total = self.n + n
+        delta = means - self.means
+        self.means += delta*n/total
+        self.M2 += M2 + np.outer(delta, delta)*self.n*n/total
+        self.n = total
+
+    def add(self, y, c = None):
+        '''
+        Adds the values y, and control values c (zeros if None), of an array of units.
+        '''
+        y = np.atleast_1d(np.asarray(y, dtype = float))
+        if len(y) == 0:
+            return
+        X = np.array([y, np.zeros(len(y)) if c is None else np.asarray(c, dtype = float)])
+        means = X.mean(axis = 1)
+        d = X - means[:, None]
+        self._combine(len(y), means, d @ d.T)
+
+    def merge(self, other):
+        '''
+        Adds the units of another MeanEstimator to these, and returns self.
+        '''
+        self._combine(other.n, other.means, other.M2)
+        return self
+
+    @property
+    def beta(self):
+        '''
+        The control variate coefficient, 0 if there are no control values.
+        '''
+        return self.M2[0, 1]/self.M2[1, 1] if self.M2[1, 1] > 0 else 0.0
+
+    @property
+    def estimate(self):
+        '''
+        The estimate of the mean time.
+        '''
+        return self.means[0] - self.beta*self.means[1]
+
+    @property
+    def var(self):
+        '''
+        The sample variance of a unit after the control variate is applied, nan for less than three units.
+        '''
+        if self.n < 3:
+            return np.nan
+        return (self.M2[0, 0] - self.beta*self.M2[0, 1])/(self.n - 2 if self.M2[1, 1] > 0 else self.n - 1)
+
+    def state(self):
+        '''
+        Returns the count, means, and sums of products as one array (see ExitStats.state).
+        '''
+        return np.concatenate([[self.n], self.means, self.M2.ravel()])
+
+    @classmethod
+    def from_state(cls, state):
+        '''
+        Creates a MeanEstimator from the array returned by state.
+        '''
+        estimator = cls()
+        state = np.asarray(state, dtype = float)
+        estimator.n = int(state[0])
+        estimator.means = state[1:3].copy()
+        estimator.M2 = state[3:].reshape(2, 2).copy()
+        return estimator
+
+class ExitStats(object):
+    '''
+    Statistics of first passage times, accumulated one time (or array of times) at a time in constant memory: the number of trials which hit a wall and which did not, the mean, variance, smallest and largest time, and a histogram with fixed bin edges, from which quantiles are estimated. Two ExitStats with the same edges can be merged (e.g. from separate processes or runs), giving the same statistics as accumulating all the times in one.
+
+    Arguments:
+    edges (list or array):
+    The edges of the histogram bins, in increasing order. Times outside the edges are counted, but not binned. If None, the times are kept until the edges are chosen with bin, e.g. from the times of the first trials (see Hist).
+
+    If variance reduction is used (see Hist), reduced holds a MeanEstimator, which gives the estimate and error of the mean instead of the plain mean of the times.
+
+    With multilevel splitting (see Hist), the times are a sample of the times of the trials which hit a wall, and probability holds the estimated fraction of trials which hit a wall. Such statistics cannot be merged.
+    '''
+    def __init__(self, edges):
+        self.edges = None
+        self.counts = None #the number of times in each bin
+        self.pending = [] #the times added before the edges were chosen
+        if edges is not None:
+            self.bin(edges)
+        self.below = 0 #the number of times below the first edge
+        self.above = 0 #the number of times above the last edge
+        self.count = 0 #the number of trials which hit a wall
+        self.missed = 0 #the number of trials which did not hit a wall
+        self.mean = 0.0
+        self.M2 = 0.0 #the sum of squared differences from the mean
+        self.min = np.inf
+        self.max = -np.inf
+        self.reduced = None #the MeanEstimator, if variance reduction is used
+        self.probability = None #the probability of hitting a wall, with multilevel splitting
+
+    def _combine(self, n, mean, M2):
+        '''
+        Combines the count, mean, and sum of squared differences of another set of times with these (Chan et al.).
+        '''
+        if n == 0:
+            return
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta*n/total
+        self.M2 += M2 + delta**2*self.count*n/total
+        self.count = total
+
+    def add(self, t):
+        '''
+        Adds a time, or an array of times, of trials which hit a wall.
+        '''
+        t = np.atleast_1d(np.asarray(t, dtype = float))
+        if len(t) == 0:
+            return
+        if self.edges is None:
+            self.pending.append(t.copy())
+        else:
+            self._bin(t)
+        mean = t.mean()
+        self._combine(len(t), mean, float(np.sum((t - mean)**2)))
+        self.min = min(self.min, t.min())
+        self.max = max(self.max, t.max())
+
+    def _bin(self, t):
+        '''
+        Adds an array of times to the histogram.
+        '''
+        i = np.searchsorted(self.edges, t, side = 'right') - 1
+        i[t == self.edges[-1]] = len(self.counts) - 1 #the last bin includes its right edge
+        inside = (i >= 0) & (i < len(self.counts))
+        self.counts += np.bincount(i[inside], minlength = len(self.counts))
+        self.below += int(np.sum(t < self.edges[0]))
+        self.above += int(np.sum(t > self.edges[-1]))
+
+    def bin(self, edges):
+        '''
+        Chooses the edges of the histogram, for an ExitStats made without them, and bins the times added so far. Returns self.
+        '''
+        if self.edges is not None:
+            raise ValueError('the edges of the histogram are already chosen')
+        self.edges = np.asarray(edges, dtype = float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype = np.int64)
+        for t in self.pending:
+            self._bin(t)
+        self.pending = None
+        return self
+
+    def add_missed(self, n = 1):
+        '''
+        Counts n trials which did not hit a wall.
+        '''
+        self.missed += int(n)
+
+    def add_reduced(self, y, c = None):
+        '''
+        Adds units to the variance reduced estimate of the mean (see MeanEstimator.add).
+        '''
+        if self.reduced is None:
+            self.reduced = MeanEstimator()
+        self.reduced.add(y, c)
+
+    def merge(self, other):
+        '''
+        Adds the statistics of another ExitStats with the same edges to these, and returns self.
+        '''
+        if self.edges is None or other.edges is None or not np.array_equal(self.edges, other.edges):
+            raise ValueError('ExitStats can only be merged if they have the same edges')
+        if self.probability is not None or other.probability is not None:
+            raise ValueError('ExitStats from multilevel splitting cannot be merged')
+        self.counts += other.counts
+        self.below += other.below
+        self.above += other.above
+        self.missed += other.missed
+        self._combine(other.count, other.mean, other.M2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if other.reduced is not None:
+            self.reduced = (self.reduced or MeanEstimator()).merge(other.reduced)
+        return self
+
+    @property
+    def var(self):
+        '''
+        The sample variance of the times, nan for less than two times.
+        '''
+        return self.M2/(self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        '''
+        The sample standard deviation of the times.
+        '''
+        return np.sqrt(self.var)
+
+    def quantile(self, q):
+        '''
+        Estimates the q-th quantile (0 <= q <= 1) of the times by interpolating linearly within the histogram bins. Quantiles outside the binned times are given as the smallest or largest time.
+        '''
+        if self.count == 0:
+            return np.nan
+        k = q*self.count #the number of times below the quantile
+        if k <= self.below:
+            return self.min
+        cum = self.below + np.cumsum(self.counts)
+        j = int(np.searchsorted(cum, k)) #the bin which holds the quantile
+        if j == len(self.counts):
+            return self.max
+        before = cum[j] - self.counts[j]
+        t = self.edges[j] + (k - before)/self.counts[j]*(self.edges[j + 1] - self.edges[j])
+        return float(min(max(t, self.min), self.max))
+
+    def estimate(self, target = 'mean'):
+        '''
+        Returns the mean of the times if target is 'mean' (the variance reduced estimate if there is one), otherwise the target-th quantile (a float between 0 and 1, see quantile).
+        '''
+        if target == 'mean':
+            return self.mean if self.reduced is None else self.reduced.estimate
+        return self.quantile(target)
+
+    def error(self, target = 'mean', z = 1.96):
+        '''
+        Estimates the half-width of the confidence interval of estimate(target), z standard errors wide (1.96 for 95%). The standard error of the mean is std/sqrt(count), or that of the variance reduced estimate if there is one. The standard error of the q-th quantile is sqrt(q*(1 - q)/count)/f, where f is the density of the times at the quantile, estimated from the histogram bin which holds it. Returns inf if there are too few times.
+        '''
+        if target == 'mean' and self.reduced is not None:
+            return z*np.sqrt(self.reduced.var/self.reduced.n) if self.reduced.n > 2 else np.inf
+        if self.count < 2:
+            return np.inf
+        if target == 'mean':
+            return z*self.std/np.sqrt(self.count)
+        t = self.quantile(target)
+        j = min(max(int(np.searchsorted(self.edges, t, side = 'right')) - 1, 0), len(self.counts) - 1) #the bin which holds the quantile
+        f = self.counts[j]/(self.count*(self.edges[j + 1] - self.edges[j]))
+        return z*np.sqrt(target*(1 - target)/self.count)/f if f > 0 else np.inf
+
+    def relative_error(self, target = 'mean', z = 1.96):
+        '''
+        Returns error(target, z) divided by estimate(target), or inf if the estimate is 0.
+        '''
+        value = abs(self.estimate(target))
+        return self.error(target, z)/value if value > 0 else np.inf
+
+    @property
+    def effective_size(self):
+        '''
+        The number of independent trials without variance reduction which would give the same error of the mean, var/(error/z)**2. The same as count if there is no variance reduction.
+        '''
+        if self.reduced is None:
+            return self.count
+        se = self.error()/1.96
+        return self.var/se**2 if se > 0 else np.inf
+
+    def state(self):
+        '''
+        Returns the statistics as a dict of arrays, which can be saved with numpy.savez and read back with from_state.
+        '''
+        if self.edges is None: #the times waiting to be binned are kept instead of the histogram
+            state = {'pending': np.concatenate(self.pending) if self.pending else np.zeros(0)}
+        else:
+            state = {'edges': self.edges, 'counts': self.counts}
+        state['scalars'] = np.array([self.below, self.above, self.count, self.missed, self.mean, self.M2, self.min, self.max])
+        if self.reduced is not None:
+            state['reduced'] = self.reduced.state()
+        if self.probability is not None:
+            state['probability'] = np.array(self.probability)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        '''
+        Creates an ExitStats from the dict of arrays returned by state.
+        '''
+        if 'pending' in state:
+            stats = cls(None)
+            stats.pending = [np.array(state['pending'], dtype = float)]
+        else:
+            stats = cls(state['edges'])
+            stats.counts = np.array(state['counts'], dtype = np.int64)
+        below, above, count, missed, stats.mean, stats.M2, stats.min, stats.max = np.asarray(state['scalars']).tolist()
+        stats.below, stats.above, stats.count, stats.missed = int(below), int(above), int(count), int(missed)
+        if 'reduced' in state:
+            stats.reduced = MeanEstimator.from_state(state['reduced'])
+        if 'probability' in state:
+            stats.probability = float(state['probability'])
+        return stats
+
+    def save(self, FileName):
+        '''
+        Saves the statistics in a .npz file, which can be read with ExitStats.load.
+        '''
+        np.savez(FileName, **self.state())
+
+    @classmethod
+    def load(cls, FileName):
+        '''
+        Reads statistics saved by save.
+        '''
+        with np.load(FileName) as data:
+            return cls.from_state(data)
+
+def Save_checkpoint(FileName, run, done, seed, times, steps):
+    '''
+    Saves the progress of a Hist run, so that it can be resumed with Load_checkpoint. The file is written under a temporary name and then renamed, so an interrupted save never leaves a broken checkpoint.
+
+    Arguments:
+    FileName (string):
+    The name of the checkpoint file (.npz).
+
+    run (string):
+    A description of the settings of the run, which must match when it is resumed.
+
+    done (int):
+    The number of trials completed, in trial order.
+
+    seed (int):
+    The root seed of the run (see trial_rng). If None, the state of the global numpy.random generator is saved instead.
+
+    times (ExitStats):
+    The statistics of the completed trials.
+
+    steps (list):
+    The (taken, rejected) step counts of the completed trials, for method 'adaptive'.
+    '''
+    state = times.state()
+    state.update(run = np.array(run), done = np.array(done), seed = np.array('' if seed is None else str(seed)), steps = np.array(steps, dtype = np.int64).reshape(-1, 2))
+    if seed is None:
+        name, keys, pos, has_gauss, gauss = np.random.get_state()
+        state.update(rng_keys = keys, rng_pos = np.array([pos, has_gauss]), rng_gauss = np.array(gauss))
+    with open(FileName + '.tmp', 'wb') as f:
+        np.savez(f, **state)
+    os.replace(FileName + '.tmp', FileName)
+
+def Load_checkpoint(FileName, run):
     '''
-    Takes a function, time range, and initial conditions, and numerically integratesthe function according to the Runge-Kutta Method.
+    Reads a checkpoint saved by Save_checkpoint. If the run had no seed, the global numpy.random generator is set back to its saved state.
 
     Arguments:
-    fun (function):
-    The ODE('s) to be integrated. Should take the independent variable (t) and the dependent variable (y) as arguments, in that order. Should return the derivative of y with respect to t.
-    For multiple ordinary differential equations, the dependent variable input should be a list of each variable. The output should return each derivative in the same order that the variables were input, as a list.
-    It is important that the initial conditions (y0) are in the same order as the output of fun.
-
-    t (array):
-    The array of values to be integrated over. t[0] is the initial condition.
+    FileName (string):
+    The name of the checkpoint file.
 
-    y0 (list or array):
-    The initial values of each variable to be integrated. Must be in the same order as the output of fun.
+    run (string):
+    The description of the settings of the run being resumed. Raises a ValueError if it does not match the checkpoint.
 
-    vals (list or array):
-    The problem parameters which fun must take in addition to t and y. Should be in the same order that they are required in the function.
+    Returns:
+    done, seed, times, steps:
+    See Save_checkpoint.
+    '''
+    with np.load(FileName) as data:
+        if str(data['run']) != run:
+            raise ValueError('the checkpoint {} was made with different settings: {}' .format(FileName, data['run']))
+        seed = str(data['seed'])
+        seed = int(seed) if seed else None
+        if seed is None:
+            pos, has_gauss = data['rng_pos'].tolist()
+            np.random.set_state(('MT19937', data['rng_keys'], pos, has_gauss, float(data['rng_gauss'])))
+        return int(data['done']), seed, ExitStats.from_state(data), [tuple(n) for n in data['steps'].tolist()]
 
-    wall_size (float):
-    The location of the second wall. The first wall is placed at x = 0. If the particle hits the wall, the simulation will stop.
+class ResultCache(object):
+    '''
+    A cache of simulation results on disk, so that runs with the same settings and seed are not simulated again. Each result is a file named after a hash of the settings and INTEGRATOR_VERSION. When the files take more than max_bytes, the least recently used are removed.
 
-    rand (list or array):
-    A random value to be added to a variable. The first input is the variable to be added to (indexed 0, 1,...). The second input is the mean of the distribution, the third input is the standard deviation of the distribution. The value is pulled from a normal distribution. The value will be multiplied by the change in t at that time step and divided by the mass, m (vals[0]). This option can be opted out of by setting rand = None, which is the default.
+    Arguments:
+    directory (string):
+    The directory the results are stored in. It is created when the first result is stored. Default '.langevin_cache'.
 
-    Returns:
-    F (matrix): 
-    The solution to the ODE's stacked vertically. The order of stacking is the same as the order of the output of fun.
+    max_bytes (int):
+    The largest total size of the stored results. Default 2**30 (1 GB).
     '''
-    F = np.zeros((len(y0), len(t))) #array to store the final values of the dependent variables
-    F[:, 0] = y0 #sets the initial values
+    def __init__(self, directory = '.langevin_cache', max_bytes = 2**30):
+        self.directory = directory
+        self.max_bytes = max_bytes
 
-    yn = np.zeros(len(y0)) #array to store the current values of the dependent variables
+    def key(self, *settings):
+        '''
+        Returns the key of a result, a hash of its settings (which must have a repr that identifies them) and INTEGRATOR_VERSION.
+        '''
+        return hashlib.sha256(repr((INTEGRATOR_VERSION,) + settings).encode()).hexdigest()
 
-    for i in range(len(t) - 1):
-        if F[0, i] <= 0 or F[0, i] >= wall_size:
-            F = F[:, :i + 1]
-            t = t[:i + 1]
-            break
-        yn = F[:, i] #sets the current values in yn
-        tn = t[i] #sets the current time
-        h = t[i + 1] - t[i] #sets the current time step
+    def path(self, key, ext):
+        '''
+        Returns the name of the file of the result with the key and the file extension ext.
+        '''
+        return os.path.join(self.directory, key + ext)
 
-	#RGK parameters
-        k1 = h*np.array(fun(tn, yn, vals))
-        k2 = h*np.array(fun(tn + h/2, yn + k1/2, vals))
-        k3 = h*np.array(fun(tn + h/2, yn + k2/2, vals))
-        k4 = h*np.array(fun(tn + h, yn + k3, vals))
+    def get(self, key, ext):
+        '''
+        Returns the name of the file of a stored result, or None if there is none. The result is marked as used.
+        '''
+        path = self.path(key, ext)
+        if not os.path.exists(path):
+            return None
+        os.utime(path) #the modification time is the last use
+        return path
 
-        F[:, i + 1] = yn + 1/6*(k1 + 2*k2 + 2*k3 + k4) #sets the next values in F
-        if rand != None:
-            F[rand[0], i + 1] += np.random.normal(loc = rand[1], scale = rand[2])*h/vals[0] #adds a random aspect to the values, if desired
-	
-    return t, F
+    def put(self, key, ext, write):
+        '''
+        Stores a result, written into an open binary file by the function write, then removes the least recently used results until the size limit is met. Returns the name of the file.
+        '''
+        os.makedirs(self.directory, exist_ok = True)
+        path = self.path(key, ext)
+        with open(path + '.tmp', 'wb') as f:
+            write(f)
+        os.replace(path + '.tmp', path)
+        self.evict()
+        return path
 
-def ODE(t, x0, vals):
+    def evict(self):
+        '''
+        Removes the least recently used results until they take at most max_bytes.
+        '''
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if not name.endswith('.tmp')]
+        files.sort(key = os.path.getmtime)
+        total = sum(os.path.getsize(name) for name in files)
+        for name in files:
+            if total <= self.max_bytes:
+                break
+            total -= os.path.getsize(name)
+            os.remove(name)
+
+    def clear(self):
+        '''
+        Removes every stored result.
+        '''
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+
+def _Hist_trial(task):
     '''
-    Takes a time, position, and velocity, and returns the velocity and acceleration for 1D Brownian motion with no random force.
+    Runs a single Hist trial. Takes a tuple so that it can be mapped over a process pool.
 
     Arguments:
-    t (float):
-    The current time.
+    task (tuple):
+    The trial number, the root seed (None to use the global random state), the file name, print, save, and file format options, the integration method, the block size, the crossing option, the tolerance, and a tuple of the arguments of Langevin in order.
 
-    x0 (list or array):
-    The first input should be the position, and the second input should be the velocity.
+    Returns:
+    hit (bool):
+    True if the particle hit a wall.
 
-    vals (list or array):
-    The Brownian motion parameters. The first input should be mass, the second input should be the damping coefficient (gamma) (all in SI units).
+    t_exit (float):
+    The time at which the simulation stopped (see Exit).
+
+    stats (dict):
+    The step counts of the trial for method 'adaptive' (see Integrate_adaptive), otherwise None.
+
+    trajectory (tuple):
+    The times, positions, and velocities of the trial if fmt is 'archive', to be added to the archive by the caller, otherwise None.
+    '''
+    i, seed, FileName, p, s, fmt, method, block_size, crossing, tol, args = task
+    wall_size = args[7]
+    rng = None if seed is None else trial_rng(seed, i)
+    stats = {} if method == 'adaptive' else None
+    if s == 'No': #only the exit time is needed, so the trajectory is not kept
+        t_exit, side, vf = FirstPassage(*args, rand = 'yes', rng = rng, method = method, block_size = block_size, crossing = crossing, tol = tol, stats = stats)
+        return side is not None, t_exit, stats, None
+    t, x, v = Langevin(*args, rand = 'yes', rng = rng, method = method, block_size = block_size, tol = tol, stats = stats) #runs a simulation
+    t_exit, side = Exit(t, x, v, wall_size, crossing)
+    if fmt == 'archive': #the trajectory is written by the caller, so every trial goes in one file
+        if p != 'No':
+            print('The final particle position is {}' .format(x[-1]))
+            print('The final particle velocity is {}' .format(v[-1]))
+        return side is not None, t_exit, stats, (t, x, v)
+    xf, vf = Save(FileName + '_' + str(i) + '.' + fmt, t, x, v, p, fmt)
+    return side is not None, t_exit, stats, None
+
+def _Hist_chunk(task):
+    '''
+    Runs a range of Hist trials at once with Integrate_ensemble. Takes a tuple so that it can be mapped over a process pool.
+
+    Arguments:
+    task (tuple):
+    The first and one past the last trial number, the root seed (None to use the global random state), the integration method, the block size, the crossing option, the histogram edges, a tuple of the arguments of Langevin in order, and the antithetic and control options (see Hist). With antithetic, start must be even.
 
     Returns:
-    [dxdt, dvdt] (list):
-    The velocity and acceleration at the specified time, position, and velocity.
+    stats (ExitStats):
+    The statistics of the exit times of the trials.
     '''
-    x = x0[0]
-    v = x0[1]
-    m = vals[0]
-    gamma = vals[1]
-    
-    dxdt = v #position is the derivative of velocity
-    dvdt = -gamma*v/m #Langevin value for acceleration
+    start, stop, seed, method, block_size, crossing, edges, args, antithetic, control = task
+    t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = args
+    if seed is None:
+        rng = None
+    elif antithetic != 'No': #trials 2k and 2k + 1 draw the same values with opposite signs
+        rng = [trial_rng(seed, i//2) if i % 2 == 0 else Antithetic(trial_rng(seed, i//2)) for i in range(start, stop)]
+    else:
+        rng = [trial_rng(seed, i) for i in range(start, stop)]
 
-    return [dxdt, dvdt]
+    t, rand, vals, x0 = params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda)
+    step, n_noise = Stepper(method, vals, rand, T*Lambda)
+    if control != 'No':
+        step = Control_step(step, Control_grad(vals, T*Lambda, wall_size))
+        x0 = x0 + [0] #the control value starts at 0
+    with PROFILE.phase('integrate'):
+        t_exit, F, hit = Integrate_ensemble(step, n_noise, t, x0, wall_size, stop - start, rng, block_size, crossing) #runs every simulation at once
 
-def params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda, rand = 'yes'):
+    stats = ExitStats(edges)
+    stats.add(t_exit[hit]) #only add times of particles which hit a wall
+    stats.add_missed(np.sum(~hit))
+    if antithetic != 'No' or control != 'No':
+        y = t_exit
+        c = F[-1] if control != 'No' else None
+        if antithetic != 'No': #each pair is one unit, a lone last trial is left out
+            n = (stop - start)//2*2
+            y = y[:n].reshape(-1, 2).mean(axis = 1)
+            c = None if c is None else c[:n].reshape(-1, 2).mean(axis = 1)
+            hit = hit[:n].reshape(-1, 2).all(axis = 1)
+        stats.add_reduced(y[hit], None if c is None else c[hit]) #units with a trial which missed the walls are left out
+    return stats
+
+def Hist_range(times, t_t):
     '''
-    Takes Brownian motion parameters and converts them into the format to be used in RGK. All parameters are in reduced units.
-    
+    Chooses the end of the histogram range of Hist from the times of the first trials, so the bins cover the exit times which are actually seen rather than all of 0 to t_t.
+
     Arguments:
+    times (ExitStats):
+    The statistics of the first trials.
+
     t_t (float):
-    The total time for the simulation.
-    
-    dt (float):
-    The time step for the simulation.
-    
-    init_pos (float):
-    The initial position of the particle.
-    
-    init_vel (float):
-    The initial velocity of the particle.
-    
-    m (float):
-    The mass of the particle.
-    
-    gamma (float):
-    The damping coefficient of the particle in the fluid.
-    
-    T (float):
-    The temperature of the system.
-    
-    Lambda (float):
-    A scaling parameter for the standard deviation of the random force. Default 1e-20.
-	
-    rand:
-    If None, the random function is disabled.
-	
+    The total time.
+
     Returns:
-    t (array):
-    An array which contains the times.
-    
-    rand (array):
-    An array which contains the random variable parameters.
-    
-    vals (array):
-    An array which contains m in the first position and gamma in the second position.
-    
-    x0 (array):
-    An array which contains init_pos in the first position and init_vel in the second position.
+    t_max (float):
+    Twice the largest exit time of the trials, at most t_t, or t_t if none of them hit a wall.
     '''
-    t = np.linspace(0, t_t, int(t_t//dt + 1)) #starts at 0 and ends at t_t
-    if rand != None:
-        rand = [1, 0, np.sqrt(2*1*T*Lambda*dt)] #Adds to velocity, centered at 0, standard deviation of sqrt(2k_B*T*lambda*(t - t'))
-                                                #Note that kB = 1 in reduced units
-    vals = [m, gamma] #mass and damping coefficient
-    x0 = [init_pos, init_vel] #initial position and velocity
-    	
-    return t, rand, vals, x0
+    if times.count == 0 or times.max <= 0:
+        return t_t
+    return min(t_t, 2*float(times.max))
 
-def Langevin(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1e-20, rand = 'yes'):
+def Hist(FileName, t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1, rand = 'yes', trials = 100, p = 'No', s = 'No', backend = 'serial', workers = 1, seed = None, method = 'rk4', block_size = 65536, fmt = 'npy', crossing = 'grid', tol = 1e-6, stats = None, bins = 100, checkpoint = 0, resume = 'No', cache = None, plot = 'Yes', precision = None, target = 'mean', batch = 1000, antithetic = 'No', control = 'No', levels = 10, t_max = None):
     '''
-    Takes Brownian motion parameters and outputs the time, position, and velocity arrays.
-    
+    Takes a file name and Brownian motion parameters and outputs a histogram with the amount of time it took to hit a wall. Also saves the data in files. The exit times are accumulated in an ExitStats as the trials finish, so the memory needed does not depend on the number of trials.
+
     Arguments:
-    See RGK
-    See params
-    
+    FileName (string):
+    The base name of the file to be saved. All trials will be saved under the format FileName_i.npy (or FileName_i.txt, or together in FileName_trials.lta, see fmt) where i is the trial number (indexed from 0), the histogram will be saved as FileName_hist.pdf, and the statistics of the times will be saved as FileName_stats.npz
+
+    trials (float):
+    The number of trials to be performed, or the largest number if precision is given. Default 100.
+
+    s:
+    If 'No', does not save the data individual data files for the histogram. Only the exit times are then kept while integrating (see FirstPassage), so long simulations need very little memory.
+
+    backend (string):
+    How the trials are integrated. 'serial' runs each trial through Langevin one after another. 'ensemble' integrates up to 65536 trials at once (see RGK_ensemble), which is much faster for many trials but does not keep the trajectories, so it cannot be combined with s. 'splitting' uses multilevel splitting (see Splitting) with trials particles in each of levels stages, for when hitting a wall before t_t is rare: the histogram is then of the times of the trials which hit a wall, weighted by the probability each stands for, and the probability of hitting a wall is kept in times.probability, printed (unless p is 'No'), and added to stats as 'probability', with the fraction which reached each level as 'level_probabilities'. 'splitting' cannot be combined with s, workers, precision, antithetic, control, or checkpoint. Default 'serial'.
+
+    workers (int):
+    The number of processes the trials are spread over. Default 1.
+
+    seed (int):
+    The root seed for the random force. If given, every trial draws from its own stream (see trial_rng), so the results are identical for any number of workers and either backend. If None and workers is 1, the global numpy.random state is used, which is the default.
+
+    method (string):
+    The integration method, 'rk4', 'ou', 'em', 'heun', 'baoab', or 'adaptive'. See Langevin. 'adaptive' only works with backend 'serial'. Default 'rk4'.
+
+    block_size (int):
+    The number of random values drawn at once. See Noise. Default 65536.
+
+    fmt (string):
+    The format of the trial data files, 'npy' or 'txt' (see Save), or 'archive' to write every trial to the single file FileName_trials.lta (see TrajectoryArchive and Archive), which is much faster to write and read for many trials. The archive is only used if fmt is 'archive'. Default 'npy'.
+
+    crossing (string):
+    How the exit times are found. 'grid' records the first time step at which a wall was reached, which is late by up to dt. 'interpolate' locates the crossing within that step (see Crossing), so a several times larger dt gives the same histogram. Default 'grid'.
+
+    tol (float):
+    The error tolerance of each step for method 'adaptive'. See Integrate_adaptive. Default 1e-6.
+
+    stats (dict):
+    If given and method is 'adaptive', it is updated with arrays of the number of steps taken ('steps') and rejected ('rejected') by each trial, in trial order. If given with precision, it is updated with the number of trials run ('trials') and the relative error reached ('precision'). Default None.
+
+    bins (int):
+    The number of histogram bins, of equal width between 0 and t_max. Default 100.
+
+    t_max (float):
+    The end of the histogram range. Times after it are counted but not binned (see ExitStats). If None, it is chosen from the times of the first 100 trials, which are kept until then and are part of the run (see Hist_range), or is t_t for backend 'splitting'. The range then depends on the random force, so it must be given to merge the statistics of separate runs (or of runs with different seeds), as only statistics with the same range can be merged. Default None.
+
+    checkpoint (int):
+    If more than 0, the progress of the run (the number of completed trials, their statistics, and the random state) is saved as FileName_checkpoint.npz about every checkpoint trials (see Save_checkpoint). The file is removed when the run finishes. Default 0.
+
+    resume:
+    If not 'No', the run continues from FileName_checkpoint.npz, which must have been made with the same settings. The results are identical to those of an uninterrupted run. Default 'No'.
+
+    cache (ResultCache):
+    If given, the statistics of runs with a seed (and s 'No') are stored in it, and a run with the same settings and seed is read from it instead of being simulated. Default None.
+
+    plot:
+    If 'No', the histogram is not plotted, and matplotlib is not imported. Default 'Yes'.
+
+    precision (float):
+    If given, trials are run in batches until the relative half-width of the 95% confidence interval of target (see ExitStats.relative_error) is at most precision, or trials trials have been run. The number of trials run and the precision reached are printed (unless p is 'No'). Default None.
+
+    target:
+    The statistic which must reach precision, 'mean' for the mean time, or a float between 0 and 1 for that quantile of the times. Default 'mean'.
+
+    batch (int):
+    The number of trials run between checks of the precision. The checks are made after the same trials whatever the backend and number of workers, so runs with a seed stop after the same number of trials. The workers are given at most batch trials at a time in total, so they stop soon after the precision is reached. Default 1000.
+
+    antithetic:
+    If not 'No', the trials are run in antithetic pairs: trial 2k + 1 is driven by the negated random values of trial 2k (see Antithetic), and the mean time is estimated from the means of the pairs. Only works with backend 'ensemble'. A seed is drawn if none is given. Default 'No'.
+
+    control:
+    If not 'No', the mean time is estimated with a control variate of mean 0 built from the exact mean exit time of free diffusion with the same m, gamma, T, and Lambda (see Control_step), which makes each step about twice as slow but can reduce the variance much more. Needs gamma > 0 and only works with backend 'ensemble'. Default 'No'.
+
+    levels (int):
+    The number of stages of backend 'splitting'. See Integrate_splitting. Default 10.
+
+    With antithetic or control, the variance reduced estimate of the mean and its error are kept in times.reduced (see MeanEstimator), and used for the mean, its error, and precision. Pairs or trials which did not hit a wall are left out of the estimate, so t_t should be long enough for nearly every trial to hit a wall. The effective sample size, the number of trials without variance reduction which would give the same error (see ExitStats.effective_size), is printed (unless p is 'No') and added to stats as 'effective_size'. The histogram is not changed.
+
+    See RGK, Save, and params for other arguments.
+
+    Saves:
+    Files for each trial containing the times, positions, and velocities. Saved as FileName_i.npy (or FileName_i.txt) where i is the trial number (indexed from 0), or all in FileName_trials.lta (with its index FileName_trials.lta.idx) if fmt is 'archive'
+
+    A histogram containing the amount of time for each trial to reach either wall (see wall_size). Saved as FileName_hist.pdf (unless plot is 'No')
+
+    The statistics of the times (see ExitStats), which can be merged with those of other runs. Saved as FileName_stats.npz
+
     Returns:
-    t (array)
-    An array which contains the times.
+    times (ExitStats):
+    The statistics of the times at which the trials hit a wall, and the number of trials which did not.
+    '''
     
-    x (array):
-    An array which contains the positions.
+    times = None #will store the statistics of the times to be saved in the histogram
+    steps = [] #the step counts of each trial, for method 'adaptive'
+    args = (t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda)
+    cacheable = cache is not None and seed is not None and s == 'No' and resume == 'No' #only runs with a given seed can be repeated
+    reduce = antithetic != 'No' or control != 'No' #whether variance reduction is used
+    if seed is None and (workers > 1 or antithetic != 'No'):
+        seed = np.random.SeedSequence().entropy #the global random state cannot be shared between processes or replayed for a pair
+
+    #the settings which change the results, and must match when resuming
+    run_settings = repr((args, trials, backend, method, crossing, tol, bins, t_max, workers if backend == 'ensemble' else None, s, precision, target, batch, antithetic, control, levels if backend == 'splitting' else None))
+    checkpoint_file = FileName + '_checkpoint.npz'
+    done = 0 #the number of completed trials
+    if resume != 'No':
+        done, seed, times, steps = Load_checkpoint(checkpoint_file, run_settings)
+    saved = done #the number of completed trials at the last checkpoint
+
+    cached = None
+    if cacheable:
+        cache_key = cache.key('Hist', run_settings, seed)
+        cached = cache.get(cache_key, '.npz')
+        if cached is not None: #every trial is read from the cache instead of being simulated
+            with np.load(cached) as data:
+                times = ExitStats.from_state(data)
+                steps = [tuple(n) for n in data['steps'].tolist()]
+            done = trials
+    if times is None: #without edges, the times are kept until the range is chosen from those of the first trials
+        times = ExitStats(None if t_max is None and backend != 'splitting' and trials > 0 else np.linspace(0, t_t if t_max is None else t_max, bins + 1))
+    pilot = min(trials, 100) if times.edges is None else 0 #the number of first trials from whose times the range is chosen
+    head = [] #results which are ready before the others are run
+    skip = done #the trials which need not be run
+
+    if backend == 'ensemble':
+        if s != 'No':
+            raise ValueError("backend = 'ensemble' does not keep trajectories, so s must be 'No'")
+        if method == 'adaptive':
+            raise ValueError("method = 'adaptive' takes different time steps in every trial, so backend must be 'serial'")
+        if precision is None:
+            n = max(workers, -(-trials//65536)) #at least one range of trials per process, of at most 65536 trials
+            bounds = np.linspace(0, trials, n + 1).astype(int)
+            if antithetic != 'No':
+                bounds[1:-1] -= bounds[1:-1] % 2 #pairs are never split between ranges
+        else:
+            batch = min(batch, 65536)
+            if antithetic != 'No':
+                batch += batch % 2
+            bounds = np.append(np.arange(0, trials, batch), trials) #one range of trials per batch, so the precision can be checked after each
+        if pilot: #every range needs the edges, so the first trials are run on their own first
+            bounds = np.union1d(bounds, [pilot])
+            first = _Hist_chunk((0, pilot, seed, method, block_size, crossing, None, args, antithetic, control))
+            times = ExitStats(np.linspace(0, Hist_range(first, t_t), bins + 1))
+            head, skip = [first.bin(times.edges)], pilot
+        n = len(bounds) - 1
+        tasks = ((bounds[j], bounds[j + 1], seed, method, block_size, crossing, times.edges, args, antithetic, control) for j in range(n) if bounds[j] >= skip and bounds[j + 1] > bounds[j])
+        run, chunksize = _Hist_chunk, 1
+    elif backend == 'serial':
+        if reduce:
+            raise ValueError("antithetic and control are only available with backend = 'ensemble'")
+        tasks = ((i, seed, FileName, p, s, fmt, method, block_size, crossing, tol, args) for i in range(done, trials))
+        run, chunksize = _Hist_trial, max(1, trials//(4*workers))
+        if precision is not None: #results arrive a chunk at a time, so larger chunks would keep running past the stop
+            chunksize = max(1, min(chunksize, batch//workers))
+    elif backend == 'splitting':
+        if s != 'No' or workers > 1 or precision is not None or reduce or checkpoint > 0:
+            raise ValueError("backend = 'splitting' cannot be combined with s, workers, precision, antithetic, control, or checkpoint")
+        if done < trials: #all the stages are run at once
+            rng = None if seed is None else np.random.default_rng(seed)
+            t_exit, weight, probs = Splitting(*args, rand = 'yes', rng = rng, method = method, block_size = block_size, crossing = crossing, levels = levels, particles = trials)
+            times.add(t_exit)
+            times.probability = weight*len(t_exit)
+            if stats is not None:
+                stats['level_probabilities'] = probs
+            done = trials
+        tasks = iter(())
+        run, chunksize = _Hist_trial, 1
+    else:
+        raise ValueError("backend must be 'serial', 'ensemble', or 'splitting', not {!r}" .format(backend))
+
+    archive = None
+    if s != 'No' and fmt == 'archive' and done < trials: #trials removed after the last checkpoint are run again
+        archive = TrajectoryArchive(FileName + '_trials.lta', 'a' if resume != 'No' else 'w', keep = done)
+
+    first, hits = done, times.count #to count the trials run and wall hits
+    pool = multiprocessing.Pool(workers) if workers > 1 and done < trials else None
+    try:
+        results = itertools.chain(head, pool.imap(run, tasks, chunksize = chunksize) if pool else map(run, tasks))
+        for result in results: #the results are accumulated as they arrive, in trial order
+            if backend == 'ensemble':
+                times.merge(result)
+                done += result.count + result.missed
+            else:
+                hit, tf, trial_steps, trajectory = result
+                if hit: #only add time if particle hit a wall
+                    times.add(tf)
+                else:
+                    times.add_missed()
+                if trial_steps is not None:
+                    steps.append((trial_steps['steps'], trial_steps['rejected']))
+                if archive is not None:
+                    archive.append(done, *trajectory)
+                done += 1
+            if times.edges is None and done >= pilot: #the first trials are binned with the range they chose
+                times.bin(np.linspace(0, Hist_range(times, t_t), bins + 1))
+            if precision is not None and times.edges is not None and (done % batch == 0 or done == trials) and times.relative_error(target) <= precision:
+                break #the target precision is reached
+            if checkpoint > 0 and done - saved >= checkpoint and done < trials:
+                if archive is not None:
+                    archive.flush() #the archive must hold every trial in the checkpoint
+                Save_checkpoint(checkpoint_file, run_settings, done, seed, times, steps)
+                saved = done
+    finally:
+        if pool:
+            pool.terminate()
+        if archive is not None:
+            archive.close()
+
+    if cacheable and cached is None:
+        cache.put(cache_key, '.npz', lambda f: np.savez(f, steps = np.array(steps, dtype = np.int64).reshape(-1, 2), **times.state()))
+
+    PROFILE.count('trials', done - first)
+    PROFILE.count('wall_hits', times.count - hits)
+    if stats is not None and steps:
+        stats['steps'], stats['rejected'] = (np.array(n) for n in zip(*steps))
+    if precision is not None:
+        reached = times.relative_error(target)
+        if stats is not None:
+            stats.update(trials = times.count + times.missed, precision = float(reached))
+        if p != 'No':
+            print('Ran {} trials: the {} time is {:.6g} +- {:.3g} (95% confidence, relative error {:.3g}, target {:.3g})' .format(times.count + times.missed, 'mean' if target == 'mean' else '{:g} quantile of the' .format(target), times.estimate(target), times.error(target), reached, precision))
+    if reduce and times.reduced is not None:
+        if stats is not None:
+            stats['effective_size'] = float(times.effective_size)
+        if p != 'No':
+            print('Variance reduction: the mean time is {:.6g} +- {:.3g} (95% confidence), as accurate as {:.0f} trials without it ({:.3g} times the {} trials run)' .format(times.estimate(), times.error(), times.effective_size, times.effective_size/(times.count + times.missed), times.count + times.missed))
     
-    v (array):
-    An array which contains the velocities.
-    '''
-    t, rand, vals, x0 = params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda)
+    if times.probability is not None:
+        if stats is not None:
+            stats['probability'] = times.probability
+        if p != 'No':
+            print('Splitting: the probability of hitting a wall before t_t is {:.4g}' .format(times.probability))
 
-    t, ans = RGK(ODE, t, x0, vals, wall_size, rand = rand)
-    x = ans[0, :]
-    v = ans[1, :]
+    #plotting
+    if plot != 'No':
+        with PROFILE.phase('plot'):
+            import matplotlib.pyplot as plt #imported only when needed, as it is slow to import
+            f = plt.figure()
+            plt.xlabel('Time', fontsize = 16)
+            if times.probability is None:
+                plt.ylabel('Frequency', fontsize = 16)
+                plt.hist(times.edges[:-1], bins = times.edges, weights = times.counts)
+            else: #each time stands for probability/count of all trials
+                plt.ylabel('Probability', fontsize = 16)
+                plt.hist(times.edges[:-1], bins = times.edges, weights = times.counts*times.probability/max(times.count, 1))
+            f.savefig(FileName + '_hist.pdf', bbox_inches = 'tight')
+            plt.close(f)
+    with PROFILE.phase('save'):
+        times.save(FileName + '_stats.npz')
+    if os.path.exists(checkpoint_file): #the run is complete
+        os.remove(checkpoint_file)
 
-    return t, x, v
+    return times
 
-def Save(FileName, t, x, v, p = 'No'):
+def Survival(FileName, t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1, nx = 400, nv = 60, p = 'No', plot = 'Yes', method = 'ou'):
     '''
-    Takes a file name, times, positions, and velocities, and saves them in a file.
-    
+    Calculates the distribution of the time to hit a wall without random trials, with FokkerPlanck, as a fast alternative to Hist with the methods 'ou', 'em', 'heun', 'baoab', or 'adaptive'.
+
     Arguments:
-    FileName (string):
-    The name of the file to be saved (with file extension)
+    nx, nv (ints):
+    The number of grid cells in x and v (see FokkerPlanck).
 
-    print:
-    If 'No', does not print final position and velocity. Will still save values to a file. Default 'No'.
-    
-    t, x, v (arrays):
-    See Langevin.
+    p (str):
+    Prints the probability of hitting a wall before t_t and the mean of the exit time (counting t_t for particles which have not hit a wall) if not 'No'. Default 'No'.
 
-    Saves:
-    File with indices, times, positions, and velocities.
+    plot (str):
+    Makes the pdf if not 'No'. Default 'Yes'.
 
-    Returns:
-    x[-1], v[-1] (floats):
-    The final position and velocity, respectively, of the particle.
-    '''
-	
-    #prints the final position and velocity
+    method (str):
+    The integration method of the Hist runs the results stand in for. A warning is given for 'rk4', whose random force FokkerPlanck does not describe, so its histograms do not match. Default 'ou'.
 
-    lines = ['index, t, x, v\n'] #list to store the lines to be saved into the file
-       			                 #the first line has headings for each column
+    See params for other arguments.
 
-    #stores each set of values
-    for i in range(len(x)):
-        lines.append(str(i) + ' ' + str(t[i]) + ' ' + str(x[i]) + ' ' + str(v[i]) + '\n')
-	
-    #saves lines into a file
-    F = open(FileName, 'w')
-    for i in range(len(lines)):
-        F.write(lines[i])
-    F.close()
+    Returns:
+    t, S, density (arrays):
+    See FokkerPlanck.
+
+    Saves:
+    FileName_fp.npz:
+    The arrays t, survival and density (see FokkerPlanck).
 
+    FileName_fp.pdf:
+    The probability density of the time to hit a wall.
+    '''
+    if method == 'rk4':
+        warnings.warn("the Fokker-Planck solution is that of the methods 'ou', 'em', 'heun', 'baoab', and 'adaptive', not of 'rk4', whose random force is much weaker")
+    t, S, density = FokkerPlanck(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda, nx, nv)
     if p != 'No':
-        print('The final particle position is {}' .format(x[-1]))
-        print('The final particle velocity is {}' .format(v[-1]))
-    return x[-1], v[-1]
+        mean = np.sum((S[1:] + S[:-1])*np.diff(t))/2 #the integral of S, by the trapezoid rule
+        print('Fokker-Planck: the probability of hitting a wall before t_t is {:.4g}, the mean exit time is {:.4g}' .format(1 - S[-1], mean))
 
-def Hist(FileName, t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1, rand = 'yes', trials = 100, p = 'No', s = 'No'):
+    if plot != 'No':
+        with PROFILE.phase('plot'):
+            import matplotlib.pyplot as plt #imported only when needed, as it is slow to import
+            f = plt.figure()
+            plt.xlabel('Time', fontsize = 16)
+            plt.ylabel('Probability density', fontsize = 16)
+            plt.plot(t, density)
+            f.savefig(FileName + '_fp.pdf', bbox_inches = 'tight')
+            plt.close(f)
+    with PROFILE.phase('save'):
+        np.savez(FileName + '_fp.npz', t = t, survival = S, density = density)
+    return t, S, density
+
+def Decimate_chunks(chunks, t_start, t_stop, points = 4000):
     '''
-    Takes a file name and Brownian motion parameters and outputs a histogram with the amount of time it took to hit a wall. Also saves the data in files.
+    Reduces a trajectory which arrives in chunks to about points points for plotting, keeping its shape. The time from t_start to t_stop is split into points/2 equal buckets (about one per pixel of a plot), and only the lowest and highest point of each bucket are kept, so every peak and dip is still drawn. Only one chunk is held in memory at a time.
 
     Arguments:
-    FileName (string):
-    The base name of the file to be saved. All trials will be saved under the format FileName_i.txt where i is the trial number (indexed from 0), the histogram will be saved as FileName.pdf, and the times will be saved as FileName_times.txt
+    chunks (iterable):
+    Generates (t, x) for each chunk, in increasing time.
 
-    trials (float):
-    The number of trials to be performed. Default 100.
+    t_start, t_stop (floats):
+    The first and last time of the trajectory.
 
-    s:
-    If 'No', does not save the data individual data files for the histogram.
+    points (int):
+    The largest number of points returned. Default 4000.
 
-    See RGK, Save, and params for other arguments.
+    Returns:
+    t, x (arrays):
+    The kept times and positions, in increasing time.
+    '''
+    buckets = max(1, points//2)
+    span = t_stop - t_start
+    lo_t = np.full(buckets, np.nan) #the time and position of the lowest point of each bucket
+    lo_x = np.full(buckets, np.inf)
+    hi_t = np.full(buckets, np.nan) #the time and position of the highest point of each bucket
+    hi_x = np.full(buckets, -np.inf)
 
-    Saves:
-    Text files for each trial containing the indices, times, positions, and velocities. Saved as FileName_i.txt where i is the trial number (indexed from 0)
+    for t, x in chunks:
+        t = np.asarray(t, dtype = float)
+        x = np.asarray(x, dtype = float)
+        if len(t) == 0:
+            continue
+        b = np.zeros(len(t), dtype = int) if span <= 0 else np.clip(((t - t_start)/span*buckets).astype(int), 0, buckets - 1)
+        starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]]) #the times are in order, so each bucket is a run of points
+        lengths = np.diff(np.r_[starts, len(t)])
+        ids = b[starts]
+        for best_t, best_x, reduce, better in [(lo_t, lo_x, np.minimum, np.less), (hi_t, hi_x, np.maximum, np.greater)]:
+            extreme = reduce.reduceat(x, starts)
+            where = np.flatnonzero(x == np.repeat(extreme, lengths)) #the points which are the extreme of their bucket
+            run, first = np.unique(np.searchsorted(starts, where, side = 'right') - 1, return_index = True)
+            i = where[first] #the first extreme point of each bucket
+            new = better(extreme, best_x[ids])
+            best_t[ids[new]] = t[i[new]]
+            best_x[ids[new]] = extreme[new]
 
-    A histogram containing the amount of time for each trial to reach either wall (see wall_size). Saved as FileName.pdf
+    used = ~np.isnan(lo_t)
+    two = used & (hi_t != lo_t) #buckets whose lowest and highest points differ
+    t = np.concatenate([lo_t[used], hi_t[two]])
+    x = np.concatenate([lo_x[used], hi_x[two]])
+    order = np.argsort(t, kind = 'stable')
+    return t[order], x[order]
+
+def Decimate(t, x, points = 4000, chunk_size = 2**20):
     '''
-    
-    times = [] #will store the times to be saved in the histogram
-    for i in range(trials):
-        t, x, v = Langevin(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda, rand = 'yes') #runs a simulation
-        if s != 'No':
-            xf, vf = Save(FileName + '_' + str(i) + '.txt', t, x, v, p)
-        if x[-1] <= 0 or x[-1] >= wall_size: #only add time if particle hit a wall
-            times.append(t[-1])
-    
-    #plotting
-    f = plt.figure()
-    plt.xlabel('Time', fontsize = 16)
-    plt.ylabel('Frequency', fontsize = 16)
-    plt.hist(times, bins = 'auto')
-    f.savefig(FileName + '_hist.pdf', bbox_inches = 'tight')
+    Reduces a trajectory to about points points for plotting, keeping its shape (see Decimate_chunks). The arrays are read chunk_size points at a time, so memory-mapped arrays (see Load) are never loaded whole. Trajectories with at most points points are returned unchanged.
+
+    Arguments:
+    t, x (arrays):
+    The times and positions.
+
+    points (int):
+    See Decimate_chunks. Default 4000.
 
-def Plot(FileName, t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1, rand = 'yes', p = 'No'):
+    chunk_size (int):
+    The number of points read at a time. Default 2**20.
+
+    Returns:
+    t, x (arrays):
+    See Decimate_chunks.
+    '''
+    n = len(t)
+    if n <= points:
+        return np.asarray(t), np.asarray(x)
+    chunks = ((t[i:i + chunk_size], x[i:i + chunk_size]) for i in range(0, n, chunk_size))
+    return Decimate_chunks(chunks, float(t[0]), float(t[n - 1]), points)
+
+def Plot(FileName, t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1, rand = 'yes', p = 'No', method = 'rk4', fmt = 'npy', seed = None, cache = None, plot = 'Yes', points = 4000):
     '''
     Plots position vs. time for Brownian motion.
 
@@ -255,25 +2886,208 @@ def Plot(FileName, t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda =
     FileName (string):
     The base name of the file which will contain the graph. Will be saved as a pdf file.
 
+    fmt (string):
+    The format of the data file, 'npy' or 'txt'. See Save. Default 'npy'.
+
+    seed (int):
+    The seed for the random force. If None, the global numpy.random state is used. Default None.
+
+    cache (ResultCache):
+    If given, trajectories with a seed are stored in it, and a run with the same settings and seed is copied from it instead of being simulated. Default None.
+
+    plot:
+    If 'No', only the data is saved, without plotting it, and matplotlib is not imported. Default 'Yes'.
+
+    points (int):
+    The largest number of points plotted. Longer trajectories are reduced with Decimate, which keeps their shape, so the pdf stays small and quick to draw. If None, every point is plotted. Default 4000.
+
     See Hist for other arguments
 
     Saves:
-    A plot of position vs. time for a single simulation of Brownian motion.
+    A plot of position vs. time for a single simulation of Brownian motion (unless plot is 'No'), and its data as FileName_plot.npy (or FileName_plot.txt).
+    '''
+
+    data = FileName + '_plot.' + fmt
+    cached = None
+    if cache is not None and seed is not None:
+        cache_key = cache.key('Plot', (t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda), method, fmt, seed)
+        cached = cache.get(cache_key, '.' + fmt)
+
+    if cached is not None: #the trajectory is copied from the cache instead of being simulated
+        shutil.copyfile(cached, data)
+        t, x, v = Load(data)
+        if p != 'No':
+            print('The final particle position is {}' .format(x[-1]))
+            print('The final particle velocity is {}' .format(v[-1]))
+    else:
+        #runs a simulation, saving it as it goes, then reads it back for plotting
+        rng = None if seed is None else np.random.default_rng(seed)
+        chunks = Langevin_chunks(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda, rand = 'yes', rng = rng, method = method)
+        Save_chunks(data, chunks, p, fmt)
+        t, x, v = Load(data)
+        if cache is not None and seed is not None:
+            def write(f):
+                with open(data, 'rb') as src:
+                    shutil.copyfileobj(src, f)
+            cache.put(cache_key, '.' + fmt, write)
+    if plot == 'No':
+        return
+    with PROFILE.phase('plot'):
+        import matplotlib.pyplot as plt #imported only when needed, as it is slow to import
+        if points:
+            t, x = Decimate(t, x, points)
+        f = plt.figure()
+        plt.xlabel('Time', fontsize = 16)
+        plt.ylabel('Position', fontsize = 16)
+        plt.plot(t, x)
+        f.savefig(FileName + '_plot.pdf', bbox_inches = 'tight')
+        plt.close(f)
+
+#the columns of a sweep table: the parameters of each point, how its trials were run, then the statistics of its exit times
+SWEEP_PARAMS = ['t_t', 'dt', 'init_pos', 'init_vel', 'm', 'gamma', 'T', 'wall_size', 'Lambda', 'trials']
+SWEEP_RUN = ['method', 'seed']
+SWEEP_STATS = ['count', 'missed', 'mean', 'std', 'min', 'median', 'max']
+
+def Load_sweep(FileName):
+    '''
+    Reads a table written by Sweep.
+
+    Returns:
+    table (structured array):
+    One row per point, with a field for each column (see SWEEP_PARAMS, SWEEP_RUN, and SWEEP_STATS). The method and seed are strings (the seed may be too large for a float), and the other fields are floats. Empty if the file does not exist.
+    '''
+    dtype = [(name, float) for name in SWEEP_PARAMS] + [('method', 'U16'), ('seed', 'U64')] + [(name, float) for name in SWEEP_STATS]
+    if not os.path.exists(FileName) or os.path.getsize(FileName) == 0:
+        return np.zeros(0, dtype = dtype)
+    with open(FileName) as F:
+        heading = F.readline().strip()
+    if heading != ','.join(SWEEP_PARAMS + SWEEP_RUN + SWEEP_STATS):
+        raise ValueError('{} is not a sweep table with the columns {}' .format(FileName, ', '.join(SWEEP_PARAMS + SWEEP_RUN + SWEEP_STATS)))
+    return np.atleast_1d(np.genfromtxt(FileName, delimiter = ',', names = True, dtype = dtype, encoding = 'utf-8'))
+
+def Parse_grid(items):
+    '''
+    Reads a parameter grid given on the command line.
+
+    Arguments:
+    items (list):
+    Strings like 'gamma=0.1,1,10', one for each swept parameter.
+
+    Returns:
+    grid (dict):
+    The values of each parameter. See Sweep.
     '''
+    grid = {}
+    for item in items:
+        name, sep, values = item.partition('=')
+        if not sep or not values:
+            raise ValueError('grid entries must look like name=value,value,..., not {!r}' .format(item))
+        grid[name] = [float(value) for value in values.split(',')]
+    return grid
 
-    t, x, v = Langevin(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda, rand = 'yes') #runs a simulation
-    Save(FileName + '_plot.txt', t, x, v, p)
-    f = plt.figure()
-    plt.xlabel('Time', fontsize = 16)
-    plt.ylabel('Position', fontsize = 16)
-    plt.plot(t, x)
-    f.savefig(FileName + '_plot.pdf', bbox_inches = 'tight')
+def Sweep(FileName, grid, t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda = 1, trials = 100, backend = 'serial', workers = 1, seed = None, method = 'rk4', block_size = 65536, crossing = 'grid', tol = 1e-6, bins = 100):
+    '''
+    Runs Hist trials for every point of a grid of parameters, and writes the statistics of the exit times of each point as a row of a table. The trials of all points are spread over the same process pool, and no plots or trial files are made. Points which are already in the table (with the same parameters, number of trials, and method, and the same seed if one is given) are skipped, so an interrupted or extended sweep only runs the missing points. The median is taken from a histogram of bins bins up to the t_t of the point.
+
+    Arguments:
+    FileName (string):
+    The name of the table, a .csv file with a line of headings (see Load_sweep). Rows are appended as the points finish.
+
+    grid (dict):
+    The values of each swept parameter, e.g. {'gamma': [0.1, 1], 'T': [100, 300]}. Any parameter of Langevin (t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, Lambda) can be swept, and every combination of the values is a point. Parameters which are not swept take the values of the arguments.
+
+    seed (int):
+    The root seed. Every point uses the same trial streams (see trial_rng), so differences between points are not hidden by noise. If None, the seed of the rows already in the table with the same method is used, so that new points share their trial streams, or a new root seed is drawn if there are none.
+
+    See Hist for other arguments.
+
+    Returns:
+    table (structured array):
+    The whole table, including rows from earlier runs. See Load_sweep.
+    '''
+    base = dict(t_t = t_t, dt = dt, init_pos = init_pos, init_vel = init_vel, m = m, gamma = gamma, T = T, wall_size = wall_size, Lambda = Lambda)
+    for name in grid:
+        if name not in base:
+            raise ValueError('cannot sweep {!r}, only {}' .format(name, ', '.join(base)))
+    if backend == 'ensemble' and method == 'adaptive':
+        raise ValueError("method = 'adaptive' takes different time steps in every trial, so backend must be 'serial'")
+    elif backend not in ('serial', 'ensemble'):
+        raise ValueError("backend must be 'serial' or 'ensemble', not {!r}" .format(backend))
+    table = Load_sweep(FileName)
+    rows = table[table['method'] == method]
+    if seed is None:
+        seed = int(rows['seed'][-1]) if len(rows) else np.random.SeedSequence().entropy
+    rows = rows[rows['seed'] == str(seed)] #rows with other methods or seeds were run with other trials
+
+    #the points which are not in the table yet
+    names = list(grid)
+    done = set(tuple(row[name] for name in SWEEP_PARAMS) for row in rows)
+    points = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        point = dict(base, **dict(zip(names, values)))
+        args = tuple(float(point[name]) for name in SWEEP_PARAMS[:-1])
+        if args + (float(trials),) not in done:
+            points.append(args)
+
+    def jobs():
+        '''
+        Generates the number of trials and the task of every job, point by point.
+        '''
+        for args in points:
+            edges = np.linspace(0, args[0], bins + 1) #up to the t_t of the point, which may be swept
+            if backend == 'ensemble':
+                n = max(1, -(-trials//65536)) #ranges of at most 65536 trials
+                bounds = np.linspace(0, trials, n + 1).astype(int)
+                for j in range(n):
+                    yield bounds[j + 1] - bounds[j], (bounds[j], bounds[j + 1], seed, method, block_size, crossing, edges, args, 'No', 'No')
+            else:
+                for i in range(trials):
+                    yield 1, (i, seed, None, 'No', 'No', None, method, block_size, crossing, tol, args)
+
+    run = _Hist_chunk if backend == 'ensemble' else _Hist_trial
+    chunksize = 1 if backend == 'ensemble' else max(1, len(points)*trials//(4*workers))
+    new = not os.path.exists(FileName) or os.path.getsize(FileName) == 0
+    with open(FileName, 'a') as F:
+        if new:
+            F.write(','.join(SWEEP_PARAMS + SWEEP_RUN + SWEEP_STATS) + '\n') #the first line has headings for each column
+        pool = multiprocessing.Pool(workers) if workers > 1 and points else None
+        try:
+            tasks = (task for n, task in jobs())
+            results = pool.imap(run, tasks, chunksize = chunksize) if pool else map(run, tasks)
+            k = 0 #the number of trials of the current point which have finished
+            point = iter(points)
+            args = next(point, None)
+            times = ExitStats(np.linspace(0, args[0], bins + 1)) if args else None
+            for (n, task), result in zip(jobs(), results): #the results arrive in the order of the jobs
+                if backend == 'ensemble':
+                    times.merge(result)
+                    PROFILE.count('wall_hits', result.count)
+                elif result[0]:
+                    times.add(result[1])
+                    PROFILE.count('wall_hits')
+                else:
+                    times.add_missed()
+                PROFILE.count('trials', n)
+                k += n
+                if k == trials: #the point is complete
+                    row = [repr(float(value)) for value in args + (trials,)] + [method, str(seed)] + [repr(float(value)) for value in [times.count, times.missed, times.mean, times.std, times.min, times.quantile(0.5), times.max]]
+                    F.write(','.join(row) + '\n')
+                    F.flush()
+                    k = 0
+                    args = next(point, None)
+                    times = ExitStats(np.linspace(0, args[0], bins + 1)) if args else None
+        finally:
+            if pool:
+                pool.terminate()
+
+    return Load_sweep(FileName)
 
 def get_parser():
     '''
     Function which allows for command line inputs.
     '''
     parser = argparse.ArgumentParser()
+    parser.add_argument('command', nargs = '?', default = 'run', choices = ['run', 'sweep', 'fp'], help = 'String: "run" to make a plot and a histogram, "sweep" to run a parameter sweep (see --grid), or "fp" to solve the Fokker-Planck equation instead of running trials (see --nx; matches the methods "ou", "em", "heun", "baoab", and "adaptive", not "rk4")')
     parser.add_argument('--FileName', type = str, default = 'd', help = 'String: Base file name')
     parser.add_argument('--t_t', type = float, default = 1000, help = 'Float: Total time of simulation')
     parser.add_argument('--dt', type = float, default = 1e-1, help = 'Float: Time step of simulation')
@@ -288,6 +3102,34 @@ def get_parser():
     parser.add_argument('--rand', type = str, default = 'Yes', help = 'String: Whether to apply the random force, None if no random force')
     parser.add_argument('--p', type = str, default = 'Yes', help = 'String: Whether to print the final result, "No" if no printing')
     parser.add_argument('--s', type = str, default = 'No', help = 'Whether to save histogram data files, "No" if no saveing')
+    parser.add_argument('--backend', type = str, default = 'serial', help = 'String: How histogram trials are integrated, "serial", "ensemble", or "splitting" (for rare wall hits)')
+    parser.add_argument('--levels', type = int, default = 10, help = 'Integer: Number of stages of the splitting backend')
+    parser.add_argument('--workers', type = int, default = 1, help = 'Integer: Number of processes to run histogram trials on')
+    parser.add_argument('--method', type = str, default = 'rk4', help = 'String: Integration method, "ou" (exact), "em", "heun", "baoab", or "adaptive" (time steps of at most dt), which converge to the same results as dt shrinks, or "rk4", whose random force depends on dt, so its results are not comparable across dt')
+    parser.add_argument('--seed', type = int, default = None, help = 'Integer: Root seed for the histogram trials, None to use the global random state')
+    parser.add_argument('--block_size', type = int, default = 65536, help = 'Integer: Number of random values generated at once')
+    parser.add_argument('--fmt', type = str, default = 'npy', help = 'String: Format of the data files, "npy" (binary), "txt", or "archive" (histogram trials in one file)')
+    parser.add_argument('--tol', type = float, default = 1e-6, help = 'Float: Error tolerance of each time step for the adaptive method')
+    parser.add_argument('--bins', type = int, default = 100, help = 'Integer: Number of histogram bins')
+    parser.add_argument('--t_max', type = float, default = None, help = 'Float: End of the histogram range, chosen from a pilot batch of trials if not given')
+    parser.add_argument('--precision', type = float, default = None, help = 'Float: Run trials until the relative error of --target is at most this, up to --trials trials')
+    parser.add_argument('--target', type = str, default = 'mean', help = 'String: Statistic for --precision, "mean" or a quantile between 0 and 1')
+    parser.add_argument('--antithetic', type = str, default = 'No', help = 'Whether to run the histogram trials in antithetic pairs, "No" if not (ensemble backend only)')
+    parser.add_argument('--control', type = str, default = 'No', help = 'Whether to estimate the mean time with a free diffusion control variate, "No" if not (ensemble backend only)')
+    parser.add_argument('--batch', type = int, default = 1000, help = 'Integer: Number of trials between checks of --precision')
+    parser.add_argument('--checkpoint', type = int, default = 0, help = 'Integer: Number of histogram trials between checkpoints, 0 for no checkpoints')
+    parser.add_argument('--resume', type = str, default = 'No', help = 'String: Whether to resume the histogram trials from the checkpoint, "No" to start over')
+    parser.add_argument('--cache', type = str, default = 'Yes', help = 'String: Whether to use the result cache for runs with a seed, "No" to bypass it, "clear" to clear it first')
+    parser.add_argument('--cache_dir', type = str, default = '.langevin_cache', help = 'String: Directory of the result cache')
+    parser.add_argument('--cache_size', type = float, default = 1024, help = 'Float: Size limit of the result cache, in MB')
+    parser.add_argument('--grid', type = str, nargs = '+', default = [], help = 'Strings: Parameter values for sweep, e.g. gamma=0.1,1,10 T=100,300')
+    parser.add_argument('--out', type = str, default = None, help = 'String: Table of the sweep results, FileName_sweep.csv if not given')
+    parser.add_argument('--nx', type = int, default = 400, help = 'Integer: Number of grid cells in position for fp')
+    parser.add_argument('--nv', type = int, default = 60, help = 'Integer: Number of grid cells in velocity for fp')
+    parser.add_argument('--profile', type = str, default = 'No', help = 'String: Whether to report the time spent in each phase of the run, "No" for no report, a .json file name to save it')
+    parser.add_argument('--no-plot', dest = 'no_plot', action = 'store_true', help = 'Do not make the plot and histogram pdfs (matplotlib is then never imported)')
+    parser.add_argument('--plot_points', type = int, default = 4000, help = 'Integer: Largest number of points in the plot, 0 to plot every point')
+    parser.add_argument('--crossing', type = str, default = 'grid', help = 'String: How exit times are found, "grid" or "interpolate" (within the time step)')
     
     args, unknown = parser.parse_known_args()
 
@@ -295,11 +3137,38 @@ def get_parser():
     
 def main():
     '''
-    Main function. Takes command line inputs. Runs Plot function then Hist function with same inputs.
+    Main function. Takes command line inputs. Runs Plot function then Hist function with same inputs. For method 'adaptive', also prints the mean number of steps per histogram trial (unless p is 'No'). With precision, the histogram trials stop once the target precision is reached. Runs with a seed use the result cache unless cache is 'No'. With no_plot, no pdfs are made. With the command sweep, runs Sweep over the grid instead, and with the command fp, runs Survival (which warns if method is 'rk4', which it does not describe). If profile is not 'No', reports the time spent in each phase of the run (see Profiler), printed, or saved as JSON if profile is a .json file name.
     '''
     args = get_parser()
-    Plot(args.FileName, args.t_t, args.dt, args.init_pos, args.init_vel, args.m, args.gamma, args.T, args.wall_size, args.Lambda, args.rand, args.p)
-    Hist(args.FileName, args.t_t, args.dt, args.init_pos, args.init_vel, args.m, args.gamma, args.T, args.wall_size, args.Lambda, args.rand, args.trials, args.p, args.s)
+    if args.profile != 'No':
+        PROFILE.reset()
+        PROFILE.enabled = True
+    start = time.perf_counter()
+
+    if args.command == 'sweep':
+        Sweep(args.out or args.FileName + '_sweep.csv', Parse_grid(args.grid), args.t_t, args.dt, args.init_pos, args.init_vel, args.m, args.gamma, args.T, args.wall_size, args.Lambda, args.trials, args.backend, args.workers, args.seed, args.method, args.block_size, args.crossing, args.tol, args.bins)
+    elif args.command == 'fp':
+        Survival(args.FileName, args.t_t, args.dt, args.init_pos, args.init_vel, args.m, args.gamma, args.T, args.wall_size, args.Lambda, args.nx, args.nv, args.p, 'No' if args.no_plot else 'Yes', args.method)
+    else:
+        stats = {}
+        cache = None
+        if args.cache != 'No':
+            cache = ResultCache(args.cache_dir, int(args.cache_size*2**20))
+            if args.cache == 'clear':
+                cache.clear()
+        Plot(args.FileName, args.t_t, args.dt, args.init_pos, args.init_vel, args.m, args.gamma, args.T, args.wall_size, args.Lambda, args.rand, args.p, args.method, 'npy' if args.fmt == 'archive' else args.fmt, args.seed, cache, 'No' if args.no_plot else 'Yes', args.plot_points)
+        Hist(args.FileName, args.t_t, args.dt, args.init_pos, args.init_vel, args.m, args.gamma, args.T, args.wall_size, args.Lambda, args.rand, args.trials, args.p, args.s, args.backend, args.workers, args.seed, args.method, args.block_size, args.fmt, args.crossing, args.tol, stats, args.bins, args.checkpoint, args.resume, cache, 'No' if args.no_plot else 'Yes', args.precision, args.target if args.target == 'mean' else float(args.target), args.batch, args.antithetic, args.control, args.levels, args.t_max)
+        if 'steps' in stats and args.p != 'No':
+            print('Steps per trial: {:.1f} taken, {:.1f} rejected' .format(stats['steps'].mean(), stats['rejected'].mean()))
+
+    if args.profile != 'No':
+        total = time.perf_counter() - start
+        PROFILE.enabled = False
+        if args.profile.endswith('.json'):
+            with open(args.profile, 'w') as f:
+                json.dump(PROFILE.report(total), f, indent = 2)
+        else:
+            PROFILE.print_report(total)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import time
+import numpy as np
+import argparse
+from Langevin.Langevin import FokkerPlanck, Stepper, Integrate_ensemble, params
+
+def monte_carlo(t_t, dt, trials, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, seed = 0):
+    '''
+    Runs trials trajectories with the exact 'ou' steps and exit times interpolated within each step.
+
+    Returns:
+    seconds (float):
+    The time taken.
+
+    mean, error (floats):
+    The mean exit time, counting t_t for trials which do not hit a wall, and its standard error.
+    '''
+    t, rand, vals, x0 = params(t_t, dt, init_pos, init_vel, m, gamma, T, 1)
+    step, n_noise = Stepper('ou', vals, rand, T)
+    start = time.perf_counter()
+    t_exit, F, hit = Integrate_ensemble(step, n_noise, t, x0, wall_size, trials, np.random.default_rng(seed), crossing = 'interpolate')
+    seconds = time.perf_counter() - start
+    t_exit = np.where(hit, t_exit, t[-1])
+    return seconds, t_exit.mean(), t_exit.std()/np.sqrt(trials)
+
+def fokker_planck(t_t, dt, nx, nv, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5):
+    '''
+    Returns the time taken by FokkerPlanck and its mean exit time, counting t_t for particles which do not hit a wall.
+    '''
+    start = time.perf_counter()
+    t, S, density = FokkerPlanck(t_t, dt, init_pos, init_vel, m, gamma, T, wall_size, 1, nx, nv)
+    return time.perf_counter() - start, np.sum((S[1:] + S[:-1])*np.diff(t))/2
+
+def main():
+    '''
+    Prints the time taken and the mean exit time given by Monte Carlo trials and by the Fokker-Planck solver on a few grids, for a particle starting at rest in the middle of walls 5 apart (with m = gamma = T = 1).
+    '''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--t_t', type = float, default = 30, help = 'Float: Total time')
+    parser.add_argument('--dt', type = float, default = 0.05, help = 'Float: Time step')
+    parser.add_argument('--trials', type = int, nargs = '+', default = [10000, 100000], help = 'Integers: Numbers of Monte Carlo trials')
+    parser.add_argument('--nx', type = int, nargs = '+', default = [100, 200, 400, 800], help = 'Integers: Numbers of grid cells in position (with 60 in velocity)')
+    args = parser.parse_args()
+
+    print('{:<24} {:>10} {:>12} {:>12}' .format('method', 'seconds', 'mean', 'error'))
+    for trials in args.trials:
+        seconds, mean, error = monte_carlo(args.t_t, args.dt, trials)
+        print('{:<24} {:>10.3f} {:>12.4f} {:>12.4f}' .format('monte carlo {}' .format(trials), seconds, mean, error))
+    for nx in args.nx:
+        seconds, mean = fokker_planck(args.t_t, args.dt, nx, 60)
+        print('{:<24} {:>10.3f} {:>12.4f} {:>12}' .format('fokker-planck nx = {}' .format(nx), seconds, mean, '-'))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+import subprocess
+import argparse
+
+#the statements timed: the interpreter alone, the module as it is imported now, and the module with matplotlib (which it imported when loaded before)
+CASES = [('python only', 'pass'),
+         ('import Langevin', 'import Langevin.Langevin'),
+         ('+ matplotlib.pyplot', 'import Langevin.Langevin; import matplotlib.pyplot')]
+
+def startup_time(statement, repeat):
+    '''
+    Runs statement in a new Python process repeat times and returns the shortest time in seconds.
+    '''
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check = True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    '''
+    Prints the startup time of a process which imports Langevin.Langevin, with and without matplotlib.pyplot, which is now only imported when a plot is made.
+    '''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type = int, default = 5, help = 'Integer: Number of times each import is timed')
+    args = parser.parse_args()
+
+    results = [(case, startup_time(statement, args.repeat)) for case, statement in CASES]
+    print('{:<24} {:>12}' .format('case', 'seconds'))
+    for case, seconds in results:
+        print('{:<24} {:>12.3f}' .format(case, seconds))
+    print('matplotlib would add {:.3f} s to every import' .format(results[2][1] - results[1][1]))
+
+if __name__ == '__main__':
+    main()
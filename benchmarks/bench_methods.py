@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import time
+import numpy as np
+import argparse
+from Langevin.Langevin import OU_coeffs, STEPPERS, Stepper, Integrate_ensemble, params
+
+def exact(t_t, init_vel, m, gamma, D):
+    '''
+    Returns the exact variance of the position and of the velocity at t_t, for a particle which starts at a known position and velocity (see OU_coeffs).
+    '''
+    a, b, sv, cx, rx = OU_coeffs(t_t, m, gamma, D)
+    return cx**2 + rx**2, sv**2
+
+def errors(method, dt, trials, t_t = 2, init_vel = 1, m = 1, gamma = 1, T = 1, Lambda = 1, seed = 0):
+    '''
+    Integrates trials trajectories with method and time step dt, with the walls out of reach, and compares the variance of their final positions and velocities with the exact values.
+
+    Returns:
+    seconds (float):
+    The time taken.
+
+    err_x, err_v (floats):
+    The relative errors of the variance of the position and of the velocity.
+    '''
+    init_pos = 1e3 #far from both walls
+    t, rand, vals, x0 = params(t_t, dt, init_pos, init_vel, m, gamma, T, Lambda)
+    step, n_noise = Stepper(method, vals, rand, T*Lambda)
+
+    start = time.perf_counter()
+    t_exit, F, hit = Integrate_ensemble(step, n_noise, t, x0, 2*init_pos, trials, np.random.default_rng(seed))
+    seconds = time.perf_counter() - start
+
+    var_x, var_v = exact(float(t[-1]), init_vel, m, gamma, T*Lambda)
+    return seconds, abs(np.var(F[0] - init_pos)/var_x - 1), abs(np.var(F[1])/var_v - 1)
+
+def main():
+    '''
+    Prints the accuracy and cost of every integration method (see Stepper) at a few time steps, and the cheapest method and time step which meets each tolerance. The accuracy is the relative error of the variance of the position and velocity after t_t = 2 (with m = gamma = T = 1), estimated from many trials, so errors below the Monte Carlo noise of about sqrt(2/trials) cannot be seen.
+    '''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type = int, default = 100000, help = 'Integer: Number of trials for each method and time step')
+    parser.add_argument('--dt', type = float, nargs = '+', default = [0.2, 0.1, 0.05, 0.02, 0.01], help = 'Floats: Time steps')
+    parser.add_argument('--tol', type = float, nargs = '+', default = [0.1, 0.03, 0.01], help = 'Floats: Tolerances of the relative error')
+    args = parser.parse_args()
+
+    rows = []
+    print('{:<8} {:>8} {:>10} {:>12} {:>12}' .format('method', 'dt', 'seconds', 'error var x', 'error var v'))
+    for method in STEPPERS:
+        for dt in args.dt:
+            seconds, err_x, err_v = errors(method, dt, args.trials)
+            rows.append((seconds, method, dt, max(err_x, err_v)))
+            print('{:<8} {:>8g} {:>10.3f} {:>12.2e} {:>12.2e}' .format(method, dt, seconds, err_x, err_v))
+
+    print('Monte Carlo noise of the errors: about {:.1e}' .format(np.sqrt(2/args.trials)))
+    for tol in args.tol:
+        ok = [row for row in rows if row[3] <= tol]
+        if ok:
+            seconds, method, dt, err = min(ok)
+            print('cheapest for tolerance {:g}: {} with dt = {:g} ({:.3f} s, error {:.1e})' .format(tol, method, dt, seconds, err))
+        else:
+            print('cheapest for tolerance {:g}: none' .format(tol))
+
+if __name__ == '__main__':
+    main()
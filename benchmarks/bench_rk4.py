@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import time
+import numpy as np
+import argparse
+from Langevin.Langevin import ODE, RK4_step, Integrate, Integrate_ensemble
+
+def ODE_generic(t, x0, vals):
+    '''
+    ODE without the out argument, so that RK4_step uses the generic path which creates new arrays at every step.
+    '''
+    return ODE(t, x0, vals)
+
+def steps_per_sec(fun, n_steps, trials = None):
+    '''
+    Times the Runge-Kutta integration of the Langevin equation (with random force) and returns the number of trial steps per second.
+
+    Arguments:
+    fun (function):
+    ODE or ODE_generic.
+
+    n_steps (int):
+    The number of time steps to integrate.
+
+    trials (int):
+    The number of trials integrated at once with Integrate_ensemble. If None, a single trajectory is integrated with Integrate.
+    '''
+    t = np.linspace(0, n_steps*1e-3, n_steps + 1)
+    step, n_noise = RK4_step(fun, [1, 1], rand = [1, 0, 1e-3])
+    rng = np.random.default_rng(0)
+
+    start = time.perf_counter()
+    if trials is None:
+        Integrate(step, n_noise, t, [1, 0], 2, rng)
+        trials = 1
+    else:
+        Integrate_ensemble(step, n_noise, t, [1, 0], 2, trials, rng)
+    return n_steps*trials/(time.perf_counter() - start)
+
+def main():
+    '''
+    Prints the steps per second of the generic (before) and in-place (after) Runge-Kutta steps.
+    '''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_steps', type = int, default = 100000, help = 'Integer: Number of time steps for a single trajectory')
+    args = parser.parse_args()
+
+    print('{:<20} {:>16} {:>16} {:>8}' .format('case', 'generic steps/s', 'in-place steps/s', 'speedup'))
+    for trials in [None, 100, 10000]:
+        n_steps = args.n_steps if trials is None else max(10, args.n_steps//trials*10)
+        before = steps_per_sec(ODE_generic, n_steps, trials)
+        after = steps_per_sec(ODE, n_steps, trials)
+        case = 'single trajectory' if trials is None else '{} trials' .format(trials)
+        print('{:<20} {:>16.0f} {:>16.0f} {:>7.1f}x' .format(case, before, after, after/before))
+
+if __name__ == '__main__':
+    main()
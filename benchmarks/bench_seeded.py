@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import time
+import numpy as np
+import argparse
+from Langevin.Langevin import Hist
+
+def seconds(trials, seed, backend, t_t, dt):
+    '''
+    Times Hist with the 'ou' method, without saving or plotting anything, and returns the seconds taken.
+    '''
+    start = time.perf_counter()
+    Hist('bench_seeded', t_t = t_t, dt = dt, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = trials, seed = seed, method = 'ou', backend = backend, plot = 'No', t_max = t_t)
+    return time.perf_counter() - start
+
+def main():
+    '''
+    Prints the time taken by the ensemble backend with the global random state (no seed) and with a seed, which gives every trial its own generator (see trial_rng), and by the serial backend with a seed, per trial. A seed is also used whenever workers is more than 1 or antithetic is set.
+    '''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type = int, nargs = '+', default = [2000, 20000], help = 'Integers: Numbers of trials of the ensemble backend')
+    parser.add_argument('--t_t', type = float, default = 20, help = 'Float: Total time')
+    parser.add_argument('--dt', type = float, default = 1e-2, help = 'Float: Time step')
+    args = parser.parse_args()
+
+    print('{:<28} {:>10} {:>16}' .format('case', 'seconds', 'ms per trial'))
+    for trials in args.trials:
+        for seed in [None, 1]:
+            s = seconds(trials, seed, 'ensemble', args.t_t, args.dt)
+            print('{:<28} {:>10.2f} {:>16.3f}' .format('ensemble {} {}' .format(trials, 'seeded' if seed else 'unseeded'), s, 1e3*s/trials))
+    trials = min(args.trials)
+    s = seconds(trials, 1, 'serial', args.t_t, args.dt)
+    print('{:<28} {:>10.2f} {:>16.3f}' .format('serial {} seeded' .format(trials), s, 1e3*s/trials))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import tempfile
+import tracemalloc
+import argparse
+import numpy as np
+from Langevin.Langevin import ODE, RGK, Langevin, Save, Hist
+
+def best_time(fun, repeat):
+    '''
+    Runs fun repeat times and returns the shortest run time in seconds, which is the least affected by other work on the machine.
+    '''
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def bench_rgk(n_steps, repeat):
+    '''
+    Returns the steps per second of RGK with ODE and the random force, for a single trajectory which never reaches a wall.
+    '''
+    t = np.linspace(0, n_steps*1e-3, n_steps + 1)
+    rng = np.random.default_rng(0)
+    return n_steps/best_time(lambda: RGK(ODE, t, [1, 0], [1, 1], 1e9, rand = [1, 0, 1e-3], rng = rng), repeat)
+
+def bench_hist(trials, repeat):
+    '''
+    Returns the seconds per trial of Hist, including writing the histogram.
+    '''
+    with tempfile.TemporaryDirectory() as d:
+        run = lambda: Hist(os.path.join(d, 'bench'), t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = trials, seed = 0)
+        return best_time(run, repeat)/trials
+
+def bench_save(n, fmt, repeat):
+    '''
+    Returns the bytes per second written by Save for a trajectory of n points.
+    '''
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 1, n)
+    x = rng.standard_normal(n)
+    v = rng.standard_normal(n)
+    with tempfile.TemporaryDirectory() as d:
+        FileName = os.path.join(d, 'bench.' + fmt)
+        elapsed = best_time(lambda: Save(FileName, t, x, v, fmt = fmt), repeat)
+        return os.path.getsize(FileName)/elapsed
+
+def bench_memory(t_t):
+    '''
+    Returns the peak memory in MB allocated by Langevin for a trajectory of t_t/0.1 steps which never reaches a wall.
+    '''
+    tracemalloc.start()
+    Langevin(t_t = t_t, dt = 1e-1, init_pos = 1e9, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 2e9, Lambda = 1, rng = np.random.default_rng(0))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak/2**20
+
+def run(quick = False, repeat = 3):
+    '''
+    Runs every benchmark at a few sizes.
+
+    Arguments:
+    quick (bool):
+    If True, only the smallest sizes are run, for a fast check. Default False.
+
+    repeat (int):
+    The number of times each timed benchmark is run. The best time is kept. Default 3.
+
+    Returns:
+    results (dict):
+    For each benchmark, its value, unit, and whether higher values are better.
+    '''
+    sizes = lambda values: values[:1] if quick else values
+    results = {}
+    for n in sizes([1000, 10000, 100000]):
+        results['rgk_steps_{}' .format(n)] = {'value': bench_rgk(n, repeat), 'unit': 'steps/s', 'higher_is_better': True}
+    for trials in sizes([10, 100]):
+        results['hist_trial_{}' .format(trials)] = {'value': bench_hist(trials, repeat), 'unit': 's/trial', 'higher_is_better': False}
+    for fmt in ['npy', 'txt']:
+        for n in sizes([10000, 1000000]):
+            results['save_{}_{}' .format(fmt, n)] = {'value': bench_save(n, fmt, repeat), 'unit': 'bytes/s', 'higher_is_better': True}
+    for t_t in sizes([1000, 100000]):
+        results['langevin_peak_{}' .format(t_t)] = {'value': bench_memory(t_t), 'unit': 'MB', 'higher_is_better': False}
+    return results
+
+def compare(baseline, current, threshold = 0.1):
+    '''
+    Compares benchmark results with a baseline.
+
+    Arguments:
+    baseline, current (dicts):
+    Results from run. Only benchmarks in both are compared.
+
+    threshold (float):
+    The relative change beyond which a benchmark which got worse is a regression. Default 0.1 (10%).
+
+    Returns:
+    rows (list):
+    (name, baseline value, current value, relative change, regression) for each benchmark. The relative change is positive if the benchmark got better.
+    '''
+    rows = []
+    for name in sorted(set(baseline) & set(current)):
+        before = baseline[name]['value']
+        after = current[name]['value']
+        change = (after - before)/before if before else 0.0
+        if not baseline[name]['higher_is_better']:
+            change = -change
+        rows.append((name, before, after, change, change < -threshold))
+    return rows
+
+def main():
+    '''
+    Runs the benchmarks and saves them as a JSON baseline (run), or compares two saved results and exits with status 1 if there is a regression (compare).
+    '''
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    run_parser = commands.add_parser('run', help = 'Run the benchmarks')
+    run_parser.add_argument('--out', type = str, default = 'benchmarks/baseline.json', help = 'String: JSON file to save the results in')
+    run_parser.add_argument('--quick', action = 'store_true', help = 'Only run the smallest sizes')
+    run_parser.add_argument('--repeat', type = int, default = 3, help = 'Integer: Number of times each benchmark is timed')
+    compare_parser = commands.add_parser('compare', help = 'Compare results with a baseline')
+    compare_parser.add_argument('baseline', type = str, help = 'String: JSON file of the baseline')
+    compare_parser.add_argument('current', type = str, help = 'String: JSON file of the new results')
+    compare_parser.add_argument('--threshold', type = float, default = 0.1, help = 'Float: Relative change which is a regression')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run(args.quick, args.repeat)
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent = 2)
+        for name, r in results.items():
+            print('{:<24} {:>16.4g} {}' .format(name, r['value'], r['unit']))
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    print('{:<24} {:>12} {:>12} {:>8}' .format('benchmark', 'baseline', 'current', 'change'))
+    for name, before, after, change, regression in rows:
+        print('{:<24} {:>12.4g} {:>12.4g} {:>+7.1%}{}' .format(name, before, after, change, '  REGRESSION' if regression else ''))
+    if any(row[-1] for row in rows):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -6,10 +6,34 @@ import matplotlib.pyplot as plt
 import os
 import os.path
 import argparse
+import unittest.mock
+import tempfile
+import glob
+import time
 import Langevin
 from Langevin import Langevin
 from Langevin.Langevin import *
 
+def remove(*patterns):
+    '''
+    Removes the files made by a test, given as glob patterns. Files kept in the repository must not match them.
+    '''
+    for pattern in patterns:
+        for name in glob.glob(pattern):
+            os.remove(name)
+
+def interrupted(n, run = FirstPassage):
+    '''
+    Returns a run (FirstPassage by default) which fails on its n-th call, like a run which dies.
+    '''
+    calls = []
+    def fail(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == n:
+            raise RuntimeError('interrupted')
+        return run(*args, **kwargs)
+    return fail
+
 class RGK_unit_tests(unittest.TestCase):
     def test_increment(self):
         t = [0.5, 1.0]
@@ -66,6 +90,105 @@ class RGK_unit_tests(unittest.TestCase):
 
         self.assertEqual(vf, 2)
 
+class RGK_ensemble_unit_tests(unittest.TestCase):
+    def test_matches_RGK(self):
+        t = np.linspace(0, 10, 101)
+        vals = [1, 0.5]
+        wall_size = 5
+        y0 = [2.5, 1.5]
+
+        t_s, F_s = RGK(ODE, t, y0, vals, wall_size, rand = None)
+        t_exit, F, hit = RGK_ensemble(ODE, t, y0, vals, wall_size, 3, rand = None)
+
+        self.assertTrue(np.all(t_exit == t_s[-1]))
+        self.assertTrue(np.all(F[0] == F_s[0, -1]))
+        self.assertTrue(np.all(F[1] == F_s[1, -1]))
+        self.assertTrue(np.all(hit))
+
+    def test_absorbed(self):
+        np.random.seed(1234)
+        t = np.linspace(0, 100, 1001)
+        t_exit, F, hit = RGK_ensemble(ODE, t, [2.5, 0], [1, 1e-1], 5, 50, rand = [1, 0, 10])
+        self.assertTrue(np.all((F[0, hit] <= 0) | (F[0, hit] >= 5)))
+        self.assertTrue(np.all(t_exit[hit] < t[-1]))
+
+    def test_no_hit(self):
+        t = np.linspace(0, 1, 11)
+        t_exit, F, hit = RGK_ensemble(ODE, t, [2.5, 0], [1, 1], 5, 4, rand = None)
+        self.assertFalse(np.any(hit))
+        self.assertTrue(np.all(t_exit == 1))
+
+class RK4_step_inplace_unit_tests(unittest.TestCase):
+    def test_single(self):
+        fused, n_noise = RK4_step(ODE, [2, 0.3], rand = [1, 0, 0.5])
+        generic, n_noise = RK4_step(lambda t, x0, vals: ODE(t, x0, vals), [2, 0.3], rand = [1, 0, 0.5])
+        y = np.array([1.5, -0.7])
+        z = np.array([0.25])
+        self.assertTrue(np.array_equal(fused(0, y, 0.1, z), generic(0, y, 0.1, z)))
+
+    def test_ensemble(self):
+        fused, n_noise = RK4_step(ODE, [2, 0.3], rand = [1, 0, 0.5])
+        generic, n_noise = RK4_step(lambda t, x0, vals: ODE(t, x0, vals), [2, 0.3], rand = [1, 0, 0.5])
+        y = np.random.default_rng(1).normal(size = (2, 5))
+        z = np.random.default_rng(2).normal(size = (1, 5))
+        self.assertTrue(np.array_equal(fused(0, y, 0.1, z), generic(0, y, 0.1, z)))
+        self.assertTrue(np.array_equal(fused(0, y[:, :3], 0.1, z[:, :3]), generic(0, y[:, :3], 0.1, z[:, :3])))
+
+class OU_unit_tests(unittest.TestCase):
+    def test_deterministic(self):
+        m, gamma = 2, 0.5
+        t = np.linspace(0, 10, 3) #exact for any time step
+        step, n_noise = OU_step([m, gamma], D = 0)
+        t, F = Integrate(step, n_noise, t, [1, 2], 1e3)
+
+        self.assertEqual(n_noise, 0)
+        self.assertAlmostEqual(F[1, -1], 2*np.exp(-gamma/m*10))
+        self.assertAlmostEqual(F[0, -1], 1 + 2*m/gamma*(1 - np.exp(-gamma/m*10)))
+
+    def test_free_particle(self):
+        h, D = 0.3, 2
+        a, b, sv, cx, rx = OU_coeffs(h, 1, 0, D)
+        self.assertEqual(a, 1)
+        self.assertEqual(b, h)
+        self.assertAlmostEqual(sv**2, 2*D*h)
+        self.assertAlmostEqual(cx*sv, D*h**2)
+        self.assertAlmostEqual(cx**2 + rx**2, 2*D*h**3/3)
+
+    def test_variance(self):
+        m, gamma, D = 2, 0.5, 3
+        step, n_noise = OU_step([m, gamma], D)
+        t_exit, F, hit = Integrate_ensemble(step, n_noise, [0, 4], [100, 0], 1e3, 100000, np.random.default_rng(1234))
+        a, b, sv, cx, rx = OU_coeffs(4, m, gamma, D)
+        self.assertAlmostEqual(np.var(F[1])/sv**2, 1, places = 1)
+        self.assertAlmostEqual(np.var(F[0])/(cx**2 + rx**2), 1, places = 1)
+
+class Stepper_unit_tests(unittest.TestCase):
+    def test_variance(self):
+        m, gamma, D = 2, 0.5, 3
+        a, b, sv, cx, rx = OU_coeffs(4, m, gamma, D)
+        for method in ['em', 'heun', 'baoab']:
+            step, n_noise = Stepper(method, [m, gamma], D = D)
+            t_exit, F, hit = Integrate_ensemble(step, n_noise, TimeGrid(0, 4, 81), [100, 0], 1e3, 20000, np.random.default_rng(1234))
+            self.assertAlmostEqual(np.var(F[1])/sv**2, 1, places = 1)
+            self.assertAlmostEqual(np.var(F[0])/(cx**2 + rx**2), 1, places = 1)
+
+    def test_single(self):
+        for method in ['em', 'heun', 'baoab']:
+            step, n_noise = Stepper(method, [1, 1], D = 1)
+            t, F = Integrate(step, n_noise, TimeGrid(0, 1, 11), [1, 0], 5, trial_rng(3, 0))
+            t_exit, F_2, hit = Integrate_ensemble(step, n_noise, TimeGrid(0, 1, 11), [1, 0], 5, 1, [trial_rng(3, 0)])
+            self.assertTrue(np.allclose(F[:, -1], F_2[:, 0]))
+
+    def test_register(self):
+        with self.assertRaises(ValueError):
+            Stepper('unknown', [1, 1])
+        Register_stepper('still', lambda vals, rand, D: (lambda tn, yn, h, z: yn, 0))
+        try:
+            t, x, v = Langevin(t_t = 1, dt = 1e-1, init_pos = 2.5, init_vel = 1, m = 1, gamma = 1, T = 300, wall_size = 5, method = 'still')
+            self.assertTrue(np.all(x == 2.5))
+        finally:
+            del STEPPERS['still']
+
 class ODE_unit_tests(unittest.TestCase):
     def test_position(self):
         dxdt, dvdt = ODE(0, [1, 1], [1, 1])
@@ -83,6 +206,12 @@ class ODE_unit_tests(unittest.TestCase):
         dxdt, dvdt = ODE(0, [1, 1], [1, 0])
         self.assertEqual(dvdt, 0)
 
+    def test_out(self):
+        out = np.zeros(2)
+        ans = ODE(0, [1, 2], [1, 1], out = out)
+        self.assertIs(ans, out)
+        self.assertEqual(list(out), [2, -2])
+
 class params_unit_tests(unittest.TestCase):
     def test_params(self):
         t, rand, vals, x0 = params(1, 0.5, 3, 5, 7, 11, 13, 17)
@@ -93,6 +222,20 @@ class params_unit_tests(unittest.TestCase):
         self.assertEqual(x0[0], 3)
         self.assertEqual(x0[1], 5)
 
+class TimeGrid_unit_tests(unittest.TestCase):
+    def test_linspace(self):
+        for stop, num in [(1000, 10001), (1, 11), (0.3, 7), (5, 1)]:
+            t = TimeGrid(0, stop, num)
+            self.assertEqual(list(t), list(np.linspace(0, stop, num)))
+            self.assertTrue(np.array_equal(np.asarray(t), np.linspace(0, stop, num)))
+
+    def test_truncate(self):
+        t = TimeGrid(0, 1, 11)[:4]
+        self.assertIsInstance(t, TimeGrid)
+        self.assertEqual(len(t), 4)
+        self.assertEqual(t[-1], np.linspace(0, 1, 11)[3])
+        self.assertEqual(len(list(t.steps())), 3)
+
 class Langevin_unit_tests(unittest.TestCase):
     def test_initial(self):
         np.random.seed(1234)
@@ -106,7 +249,108 @@ class Langevin_unit_tests(unittest.TestCase):
         self.assertEqual(x[-1], 0.501030233528514)
         self.assertEqual(v[-1], 0.0011796348540825266)
 
+    def test_ou(self):
+        t, x, v = Langevin(t_t = 1, dt = 0.25, init_pos = 0.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, Lambda = 1e-3, rng = np.random.default_rng(1234), method = 'ou')
+        self.assertEqual(x[0], 0.5)
+        self.assertEqual(len(t), 5)
+        self.assertNotEqual(x[-1], 0.5)
+
+    def test_array(self):
+        t, x, v = Langevin(t_t = 1, dt = 1e-2, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, Lambda = 1, rng = np.random.default_rng(1), method = 'ou')
+        self.assertIsInstance(t, np.ndarray)
+        self.assertTrue(np.array_equal(t, np.linspace(0, 1, 100)[:len(t)]))
+        self.assertTrue(np.array_equal(t*2 - t[0], 2*t))
+        self.assertEqual(len(t[x > 2.5]), np.sum(x > 2.5))
+
+class FirstPassage_unit_tests(unittest.TestCase):
+    def test_matches_Langevin(self):
+        for method in ['rk4', 'ou']:
+            t, x, v = Langevin(t_t = 1000, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, Lambda = 1, rng = np.random.default_rng(1234), method = method)
+            t_exit, side, vf = FirstPassage(t_t = 1000, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, Lambda = 1, rng = np.random.default_rng(1234), method = method)
+            self.assertEqual(t_exit, t[-1])
+            self.assertEqual(side, 0 if x[-1] <= 0 else 5)
+            self.assertEqual(vf, v[-1])
+
+    def test_side(self):
+        t = np.linspace(0, 10, 101)
+        t_exit, side, y = RGK_first_passage(ODE, t, [2.55, 1], [1, 0], 5, rand = None)
+        self.assertEqual(side, 5)
+        self.assertAlmostEqual(t_exit, 2.5)
+        t_exit, side, y = RGK_first_passage(ODE, t, [2.5, -1], [1, 0], 5, rand = None)
+        self.assertEqual(side, 0)
+
+    def test_no_hit(self):
+        t_exit, side, y = RGK_first_passage(ODE, np.linspace(0, 1, 11), [2.5, 0], [1, 1], 5, rand = None)
+        self.assertIsNone(side)
+        self.assertEqual(t_exit, 1)
+
+    def test_interpolate(self):
+        #x(t) = 1 - 2*(1 - exp(-t)) reaches 0 at t = ln(2)
+        step, n_noise = Stepper('rk4', [1, 1])
+        t_exit, side, y = Integrate_first_passage(step, n_noise, TimeGrid(0, 5, 51), [1, -2], 5, crossing = 'interpolate')
+        self.assertEqual(side, 0)
+        self.assertAlmostEqual(t_exit, np.log(2), places = 5)
+        t_exit, F, hit = Integrate_ensemble(step, n_noise, TimeGrid(0, 5, 51), [1, -2], 5, 3, crossing = 'interpolate')
+        self.assertTrue(hit.all())
+        self.assertTrue(np.allclose(t_exit, np.log(2), atol = 1e-5))
+
+class Adaptive_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_4_*')
+
+    def test_brownian_bridge(self):
+        W = BrownianPath(np.random.default_rng(1))
+        h, dW = W.increment(1)
+        W.put_back(h, dW)
+        h1, dW1 = W.increment(0.25)
+        h2, dW2 = W.increment(1)
+        self.assertEqual((h1, h2), (0.25, 0.75))
+        self.assertAlmostEqual(dW1 + dW2, dW)
+
+    def test_deterministic(self):
+        #x(t) = 1 + 2*(1 - exp(-t)) never reaches a wall
+        t, F, stats = Integrate_adaptive(ODE, [1, 1], 0, 10, [1, 2], 5, h_max = 1)
+        self.assertEqual(t[-1], 10)
+        self.assertTrue(np.allclose(F[0, :], 1 + 2*(1 - np.exp(-t)), atol = 1e-6))
+        self.assertEqual(stats['steps'], len(t) - 1)
+        self.assertLess(stats['steps'], 100)
+
+    def test_wall_refinement(self):
+        stats = {}
+        t, x, v = Langevin(t_t = 5, dt = 0.5, init_pos = 1, init_vel = -2, m = 1, gamma = 1, T = 300, wall_size = 5, Lambda = 0, method = 'adaptive', stats = stats)
+        self.assertLessEqual(x[-1], 0)
+        self.assertAlmostEqual(stats['h_min'], 0.005)
+        t_exit, side, vf = FirstPassage(t_t = 5, dt = 0.5, init_pos = 1, init_vel = -2, m = 1, gamma = 1, T = 300, wall_size = 5, Lambda = 0, method = 'adaptive', crossing = 'interpolate')
+        self.assertEqual(side, 0)
+        self.assertAlmostEqual(t_exit, np.log(2), places = 6)
+
+    def test_hist(self):
+        stats = {}
+        times = Hist('tests/hist_test_4', t_t = 100, dt = 0.5, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 10, seed = 42, method = 'adaptive', stats = stats)
+        self.assertEqual(len(stats['steps']), 10)
+        with self.assertRaises(ValueError):
+            Hist('tests/hist_test_4', t_t = 100, dt = 0.5, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 10, method = 'adaptive', backend = 'ensemble')
+
+class Langevin_chunks_unit_tests(unittest.TestCase):
+    def test_matches_Langevin(self):
+        t, x, v = Langevin(t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, Lambda = 1, rng = np.random.default_rng(1234))
+        for chunk_size in [1, 7, len(t), len(t) + 1]:
+            chunks = list(Langevin_chunks(t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, Lambda = 1, rng = np.random.default_rng(1234), chunk_size = chunk_size))
+            self.assertTrue(all(len(c[0]) <= chunk_size for c in chunks))
+            self.assertTrue(np.array_equal(np.concatenate([c[0] for c in chunks]), t))
+            self.assertTrue(np.array_equal(np.concatenate([c[1] for c in chunks]), x))
+            self.assertTrue(np.array_equal(np.concatenate([c[2] for c in chunks]), v))
+
+    def test_RGK_chunks(self):
+        t = np.linspace(0, 10, 101)
+        t_s, F_s = RGK(ODE, t, [2.5, 1], [1, 0.1], 5, rand = None)
+        F = np.hstack([F for t_c, F in RGK_chunks(ODE, t, [2.5, 1], [1, 0.1], 5, rand = None, chunk_size = 10)])
+        self.assertTrue(np.array_equal(F, F_s))
+
 class Save_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/file_test.npy', 'tests/file_test_chunks.*')
+
     def test_file(self):
         xf, vf = Save('tests/file_test.txt', [0, 1, 2], [3, 4, 5], [6, 7, 8], p = 'No')
         self.assertTrue(os.path.exists('tests/file_test.txt'))
@@ -122,10 +366,108 @@ class Save_unit_tests(unittest.TestCase):
         self.assertEqual(xf, 5)
         self.assertEqual(vf, 8)
 
+    def test_binary(self):
+        xf, vf = Save('tests/file_test.npy', [0, 1, 2], [3, 4, 5], [6, 7, 8], p = 'No')
+        data = np.load('tests/file_test.npy')
+        self.assertEqual(data.shape, (3, 3))
+        self.assertEqual(list(data[-1]), [2, 5, 8])
+        self.assertEqual(vf, 8)
+
+    def test_chunks(self):
+        with TrajectoryWriter('tests/file_test_chunks.npy') as w:
+            w.write([0, 1], [3, 4], [6, 7])
+            w.write([2], [5], [8])
+        t, x, v = Load('tests/file_test_chunks.npy')
+        self.assertEqual(list(t), [0, 1, 2])
+        self.assertEqual(list(x), [3, 4, 5])
+        self.assertEqual(list(v), [6, 7, 8])
+
+    def test_save_chunks(self):
+        Save('tests/file_test.txt', [0, 1, 2], [3, 4, 5], [6, 7, 8], p = 'No')
+        xf, vf = Save_chunks('tests/file_test_chunks.txt', [([0, 1], [3, 4], [6, 7]), ([2], [5], [8])])
+        self.assertEqual(open('tests/file_test_chunks.txt').read(), open('tests/file_test.txt').read())
+        self.assertEqual(xf, 5)
+
+class Load_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/file_test.npy')
+
+    def test_text(self):
+        Save('tests/file_test.txt', [0, 1, 2], [3, 4, 5], [6, 7, 8], p = 'No')
+        t, x, v = Load('tests/file_test.txt')
+        self.assertEqual(list(x), [3, 4, 5])
+
+    def test_mmap(self):
+        Save('tests/file_test.npy', [0, 1, 2], [3, 4, 5], [6, 7, 8], p = 'No')
+        t, x, v = Load('tests/file_test.npy')
+        self.assertIsInstance(t, np.memmap)
+        self.assertEqual(list(v), [6, 7, 8])
+
+class Archive_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/archive_test.lta*', 'tests/hist_test_8_*')
+
+    def test_read(self):
+        with TrajectoryArchive('tests/archive_test.lta', buffer_size = 5) as a:
+            a.append(0, [0, 1, 2], [3, 4, 5], [6, 7, 8])
+            a.append(2, [0, 1], [9, 10], [11, 12])
+            a.append(1, [0], [13], [14])
+        a = Archive('tests/archive_test.lta')
+        self.assertEqual(len(a), 3)
+        t, x, v = a[2]
+        self.assertEqual(list(x), [9, 10])
+        self.assertEqual([i for i, t, x, v in a], [0, 2, 1])
+        self.assertEqual([len(x) for i, t, x, v in a], [3, 2, 1])
+
+    def test_keep(self):
+        with TrajectoryArchive('tests/archive_test.lta') as a:
+            for i in range(4):
+                a.append(i, [0, 1], [i, i], [0, 0])
+        with TrajectoryArchive('tests/archive_test.lta', 'a', keep = 2) as a:
+            a.append(2, [0], [20], [0])
+        a = Archive('tests/archive_test.lta')
+        self.assertEqual(list(a.ids), [0, 1, 2])
+        self.assertEqual(list(a[2][1]), [20])
+        self.assertEqual(list(a[1][1]), [1, 1])
+
+    def test_interrupted(self):
+        a = TrajectoryArchive('tests/archive_test.lta')
+        a.append(0, [0, 1], [1, 2], [0, 0])
+        a.flush()
+        a.append(1, [0, 1, 2], [3, 4, 5], [0, 0, 0])
+        with unittest.mock.patch('os.replace', side_effect = RuntimeError('interrupted')): #dies after the points are written, before the index
+            with self.assertRaises(RuntimeError):
+                a.flush()
+        a.file.close()
+        old = Archive('tests/archive_test.lta')
+        self.assertEqual(list(old.ids), [0])
+        self.assertEqual(list(old[0][1]), [1, 2])
+        del old
+        with TrajectoryArchive('tests/archive_test.lta', 'a', keep = 1) as a:
+            a.append(1, [0], [7], [0])
+        a = Archive('tests/archive_test.lta')
+        self.assertEqual(list(a.ids), [0, 1])
+        self.assertEqual(list(a[1][1]), [7])
+        self.assertEqual(len(a.data), 3)
+
+    def test_Hist(self):
+        Hist('tests/hist_test_8', t_t = 20, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 10, s = 'Yes', seed = 3, plot = 'No')
+        with unittest.mock.patch('Langevin.Langevin.Langevin', interrupted(7, Langevin)):
+            with self.assertRaises(RuntimeError):
+                Hist('tests/hist_test_8', t_t = 20, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 10, s = 'Yes', fmt = 'archive', seed = 3, checkpoint = 3, plot = 'No')
+        Hist('tests/hist_test_8', t_t = 20, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 10, s = 'Yes', fmt = 'archive', seed = 3, checkpoint = 3, resume = 'Yes', plot = 'No')
+        a = Archive('tests/hist_test_8_trials.lta')
+        self.assertEqual(list(a.ids), list(range(10)))
+        for i, t, x, v in a:
+            self.assertTrue(np.array_equal(np.stack([t, x, v], 1), np.load('tests/hist_test_8_' + str(i) + '.npy')))
+
 class Hist_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_stats.npz', 'tests/hist_test_2_stats.npz', 'tests/hist_test_3_*', 'tests/hist_test_4_*')
+
     def test_file(self):
         np.random.seed(1234)
-        Hist('tests/hist_test', t_t = 1000, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 2, p = 'No', s = 'Yes')
+        Hist('tests/hist_test', t_t = 1000, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 2, p = 'No', s = 'Yes', fmt = 'txt')
         self.assertTrue(os.path.exists('tests/hist_test_0.txt'))
         self.assertTrue(os.path.exists('tests/hist_test_1.txt'))
         self.assertTrue(os.path.exists('tests/hist_test_hist.pdf'))
@@ -135,20 +477,497 @@ class Hist_unit_tests(unittest.TestCase):
         Hist('tests/hist_test_2', t_t = 1000, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 100, p = 'No', s = 'No')
         self.assertFalse(os.path.exists('tests/hist_test_2_1.txt'))
 
+    def test_ensemble(self):
+        np.random.seed(1234)
+        Hist('tests/hist_test_3', t_t = 1000, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 100, p = 'No', s = 'No', backend = 'ensemble')
+        self.assertTrue(os.path.exists('tests/hist_test_3_hist.pdf'))
+
+    def test_ensemble_save(self):
+        with self.assertRaises(ValueError):
+            Hist('tests/hist_test_3', t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 2, p = 'No', s = 'Yes', backend = 'ensemble')
+
+    def test_workers(self):
+        times1 = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = 42)
+        times3 = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, workers = 3, seed = 42)
+        self.assertEqual(times1.count, 20)
+        self.assertTrue(np.array_equal(times1.counts, times3.counts))
+        self.assertEqual(times1.mean, times3.mean)
+
+    def test_ensemble_seed(self):
+        serial = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = 42, method = 'ou')
+        ensemble = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = 42, method = 'ou', backend = 'ensemble', workers = 2, block_size = 64)
+        self.assertTrue(np.array_equal(serial.counts, ensemble.counts))
+        self.assertEqual((serial.min, serial.max), (ensemble.min, ensemble.max))
+        self.assertAlmostEqual(serial.mean, ensemble.mean)
+
+    def test_crossing(self):
+        grid = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = 42, method = 'ou')
+        serial = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = 42, method = 'ou', crossing = 'interpolate')
+        ensemble = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = 42, method = 'ou', crossing = 'interpolate', backend = 'ensemble')
+        self.assertTrue(np.array_equal(serial.counts, ensemble.counts))
+        self.assertAlmostEqual(serial.mean, ensemble.mean)
+        self.assertTrue(grid.mean - 0.1 < serial.mean <= grid.mean)
+
+    def test_missed(self):
+        times = Hist('tests/hist_test_4', t_t = 3, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = 42)
+        self.assertEqual(times.count + times.missed, 20)
+        self.assertGreater(times.missed, 0)
+        self.assertTrue(os.path.exists('tests/hist_test_4_stats.npz'))
+
+    def test_range(self):
+        first = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 50, seed = 4, method = 'ou', backend = 'ensemble', plot = 'No')
+        second = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 50, seed = 4, method = 'ou', plot = 'No')
+        self.assertTrue(np.array_equal(first.edges, second.edges)) #the pilot is the same for either backend
+        self.assertTrue(first.max < first.edges[-1] < 100)
+        with unittest.mock.patch('Langevin.Langevin.FirstPassage', side_effect = FirstPassage) as run:
+            chosen = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 150, seed = 4, method = 'ou', plot = 'No')
+        self.assertEqual(run.call_count, 150) #the first trials choose the range and are kept
+        given = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 150, seed = 4, method = 'ou', plot = 'No', t_max = chosen.edges[-1])
+        self.assertTrue(np.array_equal(chosen.counts, given.counts))
+        fixed = Hist('tests/hist_test_4', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 50, seed = 5, method = 'ou', plot = 'No', t_max = 40)
+        self.assertEqual(fixed.edges[-1], 40)
+        self.assertEqual(len(fixed.counts), 100)
+
+class Precision_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_9_*')
+
+    def test_error(self):
+        times = ExitStats(np.linspace(0, 10, 11))
+        self.assertEqual(times.error(), np.inf)
+        times.add(np.random.default_rng(0).uniform(0, 10, 10000))
+        self.assertAlmostEqual(times.error(), 1.96*times.std/100)
+        self.assertAlmostEqual(times.error(0.5), 1.96*0.5/100*10, delta = 0.01) #the density is 1/10
+        self.assertAlmostEqual(times.relative_error(0.5), times.error(0.5)/times.quantile(0.5))
+
+    def test_stop(self):
+        for target in ['mean', 0.9]:
+            stats = {}
+            times = Hist('tests/hist_test_9', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 100000, seed = 1, method = 'ou', backend = 'ensemble', plot = 'No', stats = stats, precision = 0.05, target = target, batch = 100)
+            self.assertTrue(stats['trials'] < 100000)
+            self.assertEqual(stats['trials'] % 100, 0)
+            self.assertTrue(stats['precision'] <= 0.05)
+            self.assertEqual(stats['precision'], times.relative_error(target))
+
+    def test_backends(self):
+        serial = Hist('tests/hist_test_9', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 10000, seed = 2, method = 'ou', plot = 'No', precision = 0.1, batch = 50)
+        ensemble = Hist('tests/hist_test_9', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 10000, seed = 2, method = 'ou', backend = 'ensemble', workers = 2, plot = 'No', precision = 0.1, batch = 50)
+        self.assertEqual(serial.count + serial.missed, ensemble.count + ensemble.missed)
+        self.assertAlmostEqual(serial.mean, ensemble.mean)
+
+    def test_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            times = Hist(os.path.join(directory, 'hist'), t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 20000, s = 'Yes', workers = 4, seed = 2, method = 'ou', plot = 'No', precision = 0.1, batch = 100, t_max = 100)
+            done = times.count + times.missed
+            run = len([name for name in os.listdir(directory) if name.endswith('.npy')]) #every trial which was run saved its file
+            self.assertLess(done, 20000)
+            self.assertLessEqual(run, done + 2*100) #the workers stop soon after the target is reached
+
+class VarianceReduction_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_10_*')
+
+    def test_antithetic(self):
+        z = trial_rng(5, 0).standard_normal(4)
+        self.assertTrue(np.array_equal(Antithetic(trial_rng(5, 0)).standard_normal(4), -z))
+        stats = {}
+        times = Hist('tests/hist_test_10', t_t = 50, dt = 1e-1, init_pos = 1, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 1001, seed = 1, method = 'ou', backend = 'ensemble', workers = 3, plot = 'No', stats = stats, antithetic = 'Yes')
+        self.assertEqual(times.count + times.missed, 1001)
+        self.assertEqual(times.reduced.n, 500 - times.missed) #the lone last trial is left out
+        self.assertTrue(stats['effective_size'] > 0)
+        with self.assertRaises(ValueError):
+            Hist('tests/hist_test_10', t_t = 50, dt = 1e-1, init_pos = 1, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 10, antithetic = 'Yes')
+
+    def test_control_mean(self):
+        #C has mean 0 for any method, even with large time steps
+        for method in ['em', 'ou']:
+            t, rand, vals, x0 = params(5, 0.5, 1, 0, 1, 1, 1, 1)
+            step, n_noise = Stepper(method, vals, rand, 1)
+            step = Control_step(step, Control_grad(vals, 1, 5))
+            t_exit, F, hit = Integrate_ensemble(step, n_noise, t, x0 + [0], 5, 20000, np.random.default_rng(0))
+            self.assertAlmostEqual(F[2].mean()/F[2].std(), 0, delta = 0.03)
+
+    def test_control(self):
+        stats = {}
+        plain = Hist('tests/hist_test_10', t_t = 50, dt = 1e-1, init_pos = 1, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 2000, seed = 2, method = 'ou', backend = 'ensemble', plot = 'No')
+        times = Hist('tests/hist_test_10', t_t = 50, dt = 1e-1, init_pos = 1, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 2000, seed = 2, method = 'ou', backend = 'ensemble', plot = 'No', stats = stats, control = 'Yes')
+        self.assertEqual(times.mean, plain.mean) #the times themselves are unchanged
+        self.assertTrue(times.error() < plain.error()/1.5)
+        self.assertTrue(stats['effective_size'] > 2*2000)
+        self.assertAlmostEqual(times.estimate(), plain.mean, delta = plain.error())
+        saved = ExitStats.from_state(times.state())
+        self.assertEqual(saved.estimate(), times.estimate())
+
+class Splitting_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_11_*')
+
+    def test_probability(self):
+        t, rand, vals, x0 = params(2, 5e-2, 2.5, 0, 1, 1, 1, 1)
+        step, n_noise = Stepper('ou', vals, rand, 1)
+        t_exit, F, hit = Integrate_ensemble(step, n_noise, t, x0, 5, 50000, np.random.default_rng(0))
+        brute = hit.mean()
+        t_split, weight, probs = Splitting(2, 5e-2, 2.5, 0, 1, 1, 1, 5, 1, rng = np.random.default_rng(1), method = 'ou', levels = 5, particles = 4000)
+        self.assertEqual(len(probs), 5)
+        self.assertAlmostEqual(weight*len(t_split)/brute, 1, delta = 0.15)
+        self.assertAlmostEqual(t_split.mean(), t_exit[hit].mean(), delta = 0.05)
+
+    def test_rare(self):
+        stats = {}
+        times = Hist('tests/hist_test_11', t_t = 1, dt = 1e-2, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 0.5, wall_size = 5, trials = 500, seed = 1, method = 'ou', backend = 'splitting', levels = 20, stats = stats)
+        self.assertTrue(0 < times.probability < 1e-7) #about 1e-9, far too rare for independent trials
+        self.assertEqual(stats['probability'], times.probability)
+        self.assertEqual(ExitStats.load('tests/hist_test_11_stats.npz').probability, times.probability)
+        with self.assertRaises(ValueError):
+            times.merge(ExitStats(times.edges))
+        with self.assertRaises(ValueError):
+            Hist('tests/hist_test_11', t_t = 1, dt = 1e-2, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 0.5, wall_size = 5, trials = 10, backend = 'splitting', workers = 2)
+
+    def test_wall(self):
+        t_exit, weight, probs = Splitting(1, 1e-1, 0, 0, 1, 1, 1, 5, 1, levels = 4, particles = 10)
+        self.assertEqual(weight*len(t_exit), 1)
+        self.assertTrue(np.all(t_exit == 0))
+
+class FokkerPlanck_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_12_*', 'tests/fp_test_fp.*')
+
+    def test_no_scipy(self):
+        with unittest.mock.patch.dict('sys.modules', {'scipy': None, 'scipy.sparse': None, 'scipy.sparse.linalg': None}):
+            with self.assertRaisesRegex(ImportError, 'needs scipy'):
+                FokkerPlanck(1, 0.5, 2.5, 0, 1, 1, 1, 5, 1, 10, 10)
+
+    def test_monte_carlo(self):
+        t, S, density = FokkerPlanck(5, 5e-2, 2.5, 0, 1, 1, 1, 5, nx = 200, nv = 40)
+        times = Hist('tests/hist_test_12', t_t = 5, dt = 5e-2, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 1, wall_size = 5, trials = 5000, seed = 3, method = 'ou', backend = 'ensemble', crossing = 'interpolate', bins = 10, plot = 'No', p = 'No')
+        self.assertTrue(np.array_equal(t, np.asarray(params(5, 5e-2, 2.5, 0, 1, 1, 1, 1)[0])))
+        self.assertAlmostEqual(1 - S[-1], times.count/5000, delta = 0.025)
+        self.assertTrue(np.allclose(-np.diff(np.interp(times.edges, t, S)), times.counts/5000, atol = 0.012))
+        self.assertAlmostEqual(np.sum((density[1:] + density[:-1])*np.diff(t))/2, 1 - S[-1], delta = 0.01)
+
+    def test_walls(self):
+        t, S, density = FokkerPlanck(2, 5e-2, 500, 0, 1, 1, 1, 1000, nx = 100, nv = 40) #the walls are out of reach
+        self.assertTrue(np.allclose(S, 1))
+        t, S, density = FokkerPlanck(2, 5e-2, 6, 0, 1, 1, 1, 5) #starts past a wall
+        self.assertTrue(np.all(S == 0))
+        t, S, density = FokkerPlanck(2, 5e-2, 2.5, 0, 1, 1, 1, 5, nx = 100, nv = 40)
+        self.assertTrue(np.all(np.diff(S) <= 1e-12))
+
+    def test_survival(self):
+        t, S, density = Survival('tests/fp_test', 2, 5e-2, 2.5, 0, 1, 1, 1, 5, nx = 100, nv = 40, p = 'Yes', plot = 'No')
+        with np.load('tests/fp_test_fp.npz') as data:
+            self.assertTrue(np.array_equal(data['survival'], S))
+            self.assertTrue(np.array_equal(data['density'], density))
+        with self.assertWarns(UserWarning): #the Fokker-Planck equation does not describe the rk4 random force
+            Survival('tests/fp_test', 2, 5e-2, 2.5, 0, 1, 1, 1, 5, nx = 40, nv = 40, plot = 'No', method = 'rk4')
+
+class Checkpoint_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_5_*')
+
+    def test_resume(self):
+        for seed in [42, None]:
+            np.random.seed(1234)
+            whole = Hist('tests/hist_test_5', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = seed)
+            np.random.seed(1234)
+            with unittest.mock.patch('Langevin.Langevin.FirstPassage', interrupted(14)):
+                with self.assertRaises(RuntimeError):
+                    Hist('tests/hist_test_5', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = seed, checkpoint = 5)
+            self.assertTrue(os.path.exists('tests/hist_test_5_checkpoint.npz'))
+            np.random.seed(0) #the random state is restored from the checkpoint
+            resumed = Hist('tests/hist_test_5', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 20, seed = seed, checkpoint = 5, resume = 'Yes')
+            self.assertEqual(resumed.count, whole.count)
+            self.assertEqual(resumed.mean, whole.mean)
+            self.assertTrue(np.array_equal(resumed.counts, whole.counts))
+            self.assertFalse(os.path.exists('tests/hist_test_5_checkpoint.npz'))
+
+    def test_settings(self):
+        Hist('tests/hist_test_5', t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 4, seed = 1)
+        Save_checkpoint('tests/hist_test_5_checkpoint.npz', 'other settings', 2, 1, ExitStats([0, 1]), [])
+        with self.assertRaises(ValueError):
+            Hist('tests/hist_test_5', t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 4, seed = 1, resume = 'Yes')
+
+class ResultCache_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_6_*', 'tests/plot_test_3_*')
+
+    def test_hit(self):
+        cache = ResultCache('tests/cache_test')
+        cache.clear()
+        first = Hist('tests/hist_test_6', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 10, seed = 7, cache = cache)
+        with unittest.mock.patch('Langevin.Langevin.FirstPassage', side_effect = RuntimeError('simulated')):
+            second = Hist('tests/hist_test_6', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 10, seed = 7, cache = cache)
+            with self.assertRaises(RuntimeError): #different settings are simulated
+                Hist('tests/hist_test_6', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 10, seed = 8, cache = cache)
+        self.assertEqual(second.mean, first.mean)
+        self.assertTrue(np.array_equal(second.counts, first.counts))
+        cache.clear()
+
+    def test_plot(self):
+        cache = ResultCache('tests/cache_test')
+        cache.clear()
+        Plot('tests/plot_test_3', t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, seed = 7, cache = cache)
+        t1, x1, v1 = Load('tests/plot_test_3_plot.npy', mmap = False)
+        with unittest.mock.patch('Langevin.Langevin.Langevin_chunks', side_effect = RuntimeError('simulated')):
+            Plot('tests/plot_test_3', t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, seed = 7, cache = cache)
+        t2, x2, v2 = Load('tests/plot_test_3_plot.npy', mmap = False)
+        self.assertTrue(np.array_equal(x1, x2))
+        cache.clear()
+
+    def test_evict(self):
+        cache = ResultCache('tests/cache_test', max_bytes = 250)
+        cache.clear()
+        for i in range(3):
+            path = cache.put(cache.key(i), '.bin', lambda f: f.write(bytes(100)))
+            os.utime(path, (i, i)) #uses distinct times, which the file system may not resolve
+            if i == 1:
+                cache.get(cache.key(0), '.bin') #0 is used again, so 1 is the least recently used
+        cache.evict()
+        self.assertIsNotNone(cache.get(cache.key(0), '.bin'))
+        self.assertIsNone(cache.get(cache.key(1), '.bin'))
+        cache.clear()
+
+class Sweep_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_6_*', 'tests/sweep_test*.csv')
+
+    def test_matches_Hist(self):
+        if os.path.exists('tests/sweep_test.csv'):
+            os.remove('tests/sweep_test.csv')
+        table = Sweep('tests/sweep_test.csv', {'gamma': [0.1, 1], 'wall_size': [4, 5]}, t_t = 100, dt = 1e-1, init_pos = 2, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 5, trials = 10, seed = 1, workers = 2)
+        self.assertEqual(len(table), 4)
+        times = Hist('tests/hist_test_6', t_t = 100, dt = 1e-1, init_pos = 2, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 4, trials = 10, seed = 1)
+        row = table[(table['gamma'] == 1) & (table['wall_size'] == 4)][0]
+        self.assertEqual((row['count'], row['mean']), (times.count, times.mean))
+
+    def test_skip(self):
+        if os.path.exists('tests/sweep_test_2.csv'):
+            os.remove('tests/sweep_test_2.csv')
+        Sweep('tests/sweep_test_2.csv', {'T': [100, 300]}, t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 5, trials = 5, seed = 1)
+        with unittest.mock.patch('Langevin.Langevin.FirstPassage', side_effect = RuntimeError('simulated')):
+            table = Sweep('tests/sweep_test_2.csv', {'T': [300, 100]}, t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 5, trials = 5, seed = 1)
+        self.assertEqual(list(table['T']), [100, 300])
+        self.assertEqual(Parse_grid(['T=1,2', 'gamma=3']), {'T': [1, 2], 'gamma': [3]})
+
+    def test_method(self):
+        Sweep('tests/sweep_test_3.csv', {'T': [100]}, t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 5, trials = 5)
+        with unittest.mock.patch('Langevin.Langevin.FirstPassage', side_effect = RuntimeError('simulated')):
+            table = Sweep('tests/sweep_test_3.csv', {'T': [100]}, t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 5, trials = 5) #no seed, so the seed of the row is reused
+            with self.assertRaises(RuntimeError):
+                Sweep('tests/sweep_test_3.csv', {'T': [100]}, t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 5, trials = 5, method = 'ou')
+            with self.assertRaises(RuntimeError):
+                Sweep('tests/sweep_test_3.csv', {'T': [100]}, t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 5, trials = 5, seed = int(table['seed'][0]) + 1)
+        self.assertEqual((len(table), table['method'][0]), (1, 'rk4'))
+
+    def test_t_t(self):
+        table = Sweep('tests/sweep_test_4.csv', {'t_t': [2, 100]}, t_t = 100, dt = 1e-2, init_pos = 0.5, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 5, trials = 20, seed = 1, method = 'ou', backend = 'ensemble')
+        times = Hist('tests/hist_test_6', t_t = 2, dt = 1e-2, init_pos = 0.5, init_vel = 0, m = 1, gamma = 1, T = 300, wall_size = 5, trials = 20, seed = 1, method = 'ou', backend = 'ensemble', plot = 'No', t_max = 2)
+        row = table[table['t_t'] == 2][0]
+        self.assertEqual((row['count'], row['median']), (times.count, times.quantile(0.5))) #binned up to its own t_t, not the largest
+
+class Profiler_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_6_*')
+
+    def test_disabled(self):
+        profile = Profiler()
+        with profile.phase('a'):
+            profile.count('n')
+        self.assertEqual(profile.report(), {'seconds': {}, 'counts': {}})
+
+    def test_nested(self):
+        profile = Profiler()
+        profile.enabled = True
+        with profile.phase('outer'):
+            with profile.phase('inner'):
+                time.sleep(0.02)
+            profile.count('n', 2)
+        items = list(profile.timed(range(3), 'inner'))
+        report = profile.report(total = 1)
+        self.assertEqual(items, [0, 1, 2])
+        self.assertEqual(report['counts'], {'n': 2})
+        self.assertGreaterEqual(report['seconds']['inner'], 0.02)
+        self.assertLess(report['seconds']['outer'], 0.02) #the inner phase is not included
+
+    def test_Hist(self):
+        PROFILE.reset()
+        PROFILE.enabled = True
+        try:
+            times = Hist('tests/hist_test_6', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 10, seed = 1)
+        finally:
+            PROFILE.enabled = False
+        report = PROFILE.report()
+        self.assertEqual(report['counts']['trials'], 10)
+        self.assertEqual(report['counts']['wall_hits'], times.count)
+        self.assertIn('integrate', report['seconds'])
+        self.assertIn('plot', report['seconds'])
+
+class ExitStats_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/file_test_stats.npz')
+
+    def test_bin(self):
+        t = np.random.default_rng(2).exponential(size = 100)
+        whole = ExitStats(np.linspace(0, 5, 11))
+        whole.add(t)
+        later = ExitStats(None)
+        later.add(t[:40])
+        later = ExitStats.from_state(later.state()) #as from a checkpoint
+        later.add(t[40:])
+        later.bin(np.linspace(0, 5, 11))
+        self.assertTrue(np.array_equal(later.counts, whole.counts))
+        self.assertEqual((later.count, later.above), (whole.count, whole.above))
+        with self.assertRaises(ValueError):
+            later.bin(np.linspace(0, 5, 11))
+
+    def test_merge(self):
+        t = np.random.default_rng(1).exponential(size = 1000)
+        whole = ExitStats(np.linspace(0, 5, 51))
+        whole.add(t)
+        parts = ExitStats(np.linspace(0, 5, 51))
+        for i in range(0, 1000, 300):
+            part = ExitStats(np.linspace(0, 5, 51))
+            for ti in t[i:i + 300]:
+                part.add(ti)
+            parts.merge(part)
+        self.assertEqual(parts.count, 1000)
+        self.assertTrue(np.array_equal(parts.counts, whole.counts))
+        self.assertAlmostEqual(parts.mean, np.mean(t))
+        self.assertAlmostEqual(parts.var, np.var(t, ddof = 1))
+        self.assertEqual(parts.above, np.sum(t > 5))
+        self.assertAlmostEqual(whole.quantile(0.5), np.median(t), places = 1)
+
+    def test_save(self):
+        stats = ExitStats([0, 1, 2])
+        stats.add([0.5, 1.5, 2])
+        stats.add_missed(3)
+        stats.save('tests/file_test_stats.npz')
+        loaded = ExitStats.load('tests/file_test_stats.npz')
+        self.assertEqual(list(loaded.counts), [1, 2])
+        self.assertEqual((loaded.count, loaded.missed, loaded.mean, loaded.max), (3, 3, stats.mean, 2))
+        with self.assertRaises(ValueError):
+            loaded.merge(ExitStats([0, 1]))
+
+class Noise_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_13_*')
+
+    def test_block_size(self):
+        z = np.array(list(Noise(np.random.default_rng(1), 2, 100, block_size = 14)))
+        self.assertEqual(z.shape, (100, 2))
+        self.assertTrue(np.array_equal(z, np.random.default_rng(1).standard_normal((100, 2))))
+
+    def test_trials(self):
+        rngs = [np.random.default_rng(i) for i in range(3)]
+        z = np.array(list(Noise(rngs, 1, 10, block_size = 8)))
+        self.assertEqual(z.shape, (10, 1, 3))
+        self.assertTrue(np.array_equal(z[:, 0, 2], np.random.default_rng(2).standard_normal(10)))
+
+    def test_no_noise(self):
+        self.assertEqual(list(Noise(None, 0, 3)), [None, None, None])
+
+    def test_rewind(self):
+        rng = np.random.default_rng(4)
+        noise = Noise(rng, 2, 100, block_size = 64)
+        z = [next(noise) for i in range(5)]
+        noise.close() #the values left in the block are given back
+        self.assertTrue(np.array_equal(rng.standard_normal(2), np.random.default_rng(4).standard_normal(12)[10:]))
+        results = []
+        for block_size in [1, 64, 65536]:
+            np.random.seed(5) #the global random state is shared by the trials, one after another
+            times = Hist('tests/hist_test_13', t_t = 1000, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 5, block_size = block_size, plot = 'No', t_max = 20)
+            results.append((times.mean, list(times.counts)))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+class trial_rng_unit_tests(unittest.TestCase):
+    def test_spawn(self):
+        child = np.random.default_rng(np.random.SeedSequence(7).spawn(4)[3])
+        self.assertEqual(trial_rng(7, 3).normal(), child.normal())
+
+    def test_independent(self):
+        self.assertNotEqual(trial_rng(7, 0).normal(), trial_rng(7, 1).normal())
+
 class Plot_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/plot_test_2_*')
+
     def test_plot(self):
         np.random.seed(1234)
-        Plot('tests/plot_test', t_t = 1000, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 20, p = 'No')
+        Plot('tests/plot_test', t_t = 1000, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 20, p = 'No', fmt = 'txt')
         self.assertTrue(os.path.exists('tests/plot_test_plot.pdf'))
         self.assertTrue(os.path.exists('tests/plot_test_plot.txt'))
 
+    def test_binary(self):
+        np.random.seed(1234)
+        Plot('tests/plot_test_2', t_t = 100, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 20, p = 'No')
+        self.assertTrue(os.path.exists('tests/plot_test_2_plot.npy'))
+
+class Decimate_unit_tests(unittest.TestCase):
+    def test_extrema(self):
+        rng = np.random.default_rng(0)
+        t = np.linspace(0, 10, 100001)
+        x = np.cumsum(rng.standard_normal(len(t)))
+        td, xd = Decimate(t, x, points = 400)
+        self.assertTrue(len(td) <= 400)
+        self.assertTrue(np.all(np.diff(td) > 0))
+        self.assertEqual(xd.min(), x.min())
+        self.assertEqual(xd.max(), x.max())
+        self.assertTrue(set(zip(td, xd)) <= set(zip(t, x)))
+
+    def test_chunks(self):
+        rng = np.random.default_rng(1)
+        t = np.linspace(0, 10, 10001)
+        x = rng.standard_normal(len(t))
+        td, xd = Decimate(t, x, points = 100)
+        td_2, xd_2 = Decimate(t, x, points = 100, chunk_size = 777)
+        self.assertTrue(np.array_equal(td, td_2))
+        self.assertTrue(np.array_equal(xd, xd_2))
+
+    def test_short(self):
+        t = np.arange(10.0)
+        td, xd = Decimate(t, t**2, points = 100)
+        self.assertTrue(np.array_equal(td, t))
+        self.assertTrue(np.array_equal(xd, t**2))
+
+class Headless_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('tests/hist_test_7_*', 'tests/plot_test_4_*')
+
+    def test_lazy_import(self):
+        import subprocess, sys
+        code = 'import sys, Langevin.Langevin; print("matplotlib" in sys.modules)'
+        out = subprocess.run([sys.executable, '-c', code], capture_output = True, text = True, check = True).stdout
+        self.assertEqual(out.strip(), 'False')
+
+    def test_no_plot(self):
+        Hist('tests/hist_test_7', t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, trials = 5, plot = 'No')
+        Plot('tests/plot_test_4', t_t = 10, dt = 1e-1, init_pos = 2.5, init_vel = 0, m = 1, gamma = 1e-1, T = 300, wall_size = 5, plot = 'No')
+        self.assertTrue(os.path.exists('tests/hist_test_7_stats.npz'))
+        self.assertTrue(os.path.exists('tests/plot_test_4_plot.npy'))
+        self.assertFalse(os.path.exists('tests/hist_test_7_hist.pdf'))
+        self.assertFalse(os.path.exists('tests/plot_test_4_plot.pdf'))
+
 class main_unit_tests(unittest.TestCase):
+    def tearDown(self):
+        remove('d_plot.npy', 'd_stats.npz')
+
     def test_main(self):
         np.random.seed(12345)
-        main()
+        with unittest.mock.patch('sys.argv', ['Langevin.py']):
+            main()
         self.assertTrue(os.path.exists('d_hist.pdf'))
         self.assertTrue(os.path.exists('d_plot.pdf'))
-        self.assertTrue(os.path.exists('d_plot.txt'))
+        self.assertTrue(os.path.exists('d_plot.npy'))
+        times = ExitStats.load('d_stats.npz')
+        self.assertGreater(np.count_nonzero(times.counts), 20) #the default histogram spreads over the exit times seen
+        self.assertLess(times.above, times.count/100)
+
+    def test_command(self):
+        with unittest.mock.patch('sys.argv', ['Langevin.py', 'swep']), unittest.mock.patch('sys.stderr'):
+            with self.assertRaises(SystemExit) as cm:
+                main()
+        self.assertEqual(cm.exception.code, 2) #a usage error, before anything is run
 
 if __name__ == '__main__':
     unittest.main()